@@ -0,0 +1,76 @@
+import json
+from array import array
+from itertools import accumulate
+from moments import GapCounter
+from primes import Primes
+import vector
+
+class Batch:
+    """
+    Answers many range queries from a single sieve of {1..𝑦} up to the largest 𝑦:
+    counts come from prefix counts of the Index, sums from prefix sums of the primes,
+    lowest and highest primes and gaps from zero-copy slices of the primes.
+    """
+    def __init__(self, lines, engine = None, cache = None) -> None:
+        self.queries = [parse(line) for line in lines if line.strip() and not line.lstrip().startswith("#")]
+        last = max((query[1] for query in self.queries if isinstance(query, tuple)), default = 2)
+        self.primes = Primes(1, max(last, 2), engine = engine, cache = cache)
+        primes = self.primes.all.list
+        if vector.is_array(primes):
+            self.list = primes
+            self.sums = vector.numpy.concatenate(([0], vector.numpy.cumsum(primes)))
+        else:
+            self.list = memoryview(primes)
+            self.sums = array("Q", accumulate(primes, initial = 0))
+
+    def results(self):
+        """Yields one result for each query, in input order."""
+        for query in self.queries:
+            yield self.query(*query) if isinstance(query, tuple) else {"error": query}
+
+    def query(self, first: int, last: int) -> dict:
+        index = self.primes.index
+        lo, hi = index.pi(first - 1), index.pi(last)
+        return describe(first, last, self.list[lo:hi], int(self.sums[hi] - self.sums[lo]))
+
+    def write(self, file) -> None:
+        """Writes the results as NDJSON."""
+        for result in self.results():
+            file.write(json.dumps(result) + "\n")
+
+def describe(first: int, last: int, primes, total: int = None) -> dict:
+    """Count, lowest and highest prime, sum (given or computed) and gaps of the primes of {first..last}."""
+    result = {"first": first, "last": last, "count": len(primes), "lowest": None, "highest": None,
+        "sum": sum(primes) if total is None else total, "gap_max": None, "gap_min": None, "gap_common": None}
+    if len(primes) > 0:
+        result["lowest"] = int(primes[0])
+        result["highest"] = int(primes[-1])
+    if len(primes) >= 2:
+        if vector.is_array(primes):
+            counter = vector.gaps(primes)
+        else:
+            counter = GapCounter()
+            counter.add(primes)
+        result["gap_max"] = max(counter)
+        result["gap_min"] = min(counter)
+        result["gap_common"] = max(counter, key = lambda gap: counter[gap][0])
+    return result
+
+def parse(line: str):
+    """(first, last) of a line with "𝑥 𝑦" or "𝑥" (for {1..𝑥}), or the error message."""
+    numbers = line.replace(",", " ").split()
+    if len(numbers) > 2:
+        return f"{Primes.str('argsm')}: {line.strip()}"
+    try:
+        first = int(numbers[0]) if len(numbers) == 2 else 1
+    except ValueError:
+        return f"{Primes.str('b_int')}: {line.strip()}"
+    try:
+        last = int(numbers[-1])
+    except ValueError:
+        return f"{Primes.str('e_int')}: {line.strip()}"
+    if first < 1: return f"{Primes.str('b_pos')}: {line.strip()}"
+    if last < 1: return f"{Primes.str('e_pos')}: {line.strip()}"
+    if first > last: return f"{Primes.str('e_gtb')}: {line.strip()}"
+    if last > Primes.span: return f"{Primes.str('e_bat')}: {line.strip()}"
+    return first, last
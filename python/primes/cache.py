@@ -0,0 +1,133 @@
+import mmap, os
+from array import array
+from bisect import bisect_left, bisect_right
+from sieve import SegmentedSieve, unpack
+import vector
+
+class Cache:
+    """
+    Directory of sieved blocks. Block k is the bit-packed, odd-only bitmap of the
+    `SegmentedSieve.segment` odd numbers from 2k·segment + 1 on, stored as a file
+    and reopened with mmap. Least recently used blocks are evicted when the files
+    take more than `limit` bytes.
+    """
+    limit = 1 << 30
+
+    def __init__(self, directory: str = None) -> None:
+        if directory is None:
+            home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            directory = os.path.join(home, "primes", f"odd-{SegmentedSieve.segment}")
+        self.directory = directory
+
+    def path(self, k: int) -> str:
+        return os.path.join(self.directory, f"{k}.bits")
+
+    def load(self, k: int):
+        """Read-only mmap of block k, or None when it is not cached."""
+        try:
+            with open(self.path(k), "rb") as file:
+                block = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+            if len(block) != SegmentedSieve.segment // 8:
+                block.close()
+                return None
+            os.utime(self.path(k))
+            return block
+        except (OSError, ValueError):
+            return None
+
+    def store(self, k: int, bitmap: bytearray) -> None:
+        """Writes block k atomically; the cache is best effort, so write errors are ignored."""
+        try:
+            os.makedirs(self.directory, exist_ok = True)
+            temp = f"{self.path(k)}.{os.getpid()}"
+            with open(temp, "wb") as file:
+                file.write(bitmap)
+            os.replace(temp, self.path(k))
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """Removes least recently used blocks; blocks removed meanwhile by another process are skipped."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".bits")]
+        except OSError:
+            return
+        files = []
+        for entry in entries:
+            try:
+                files.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except OSError:
+                pass
+        files.sort()
+        size = sum(file[1] for file in files)
+        for mtime, length, path in files:
+            if size <= self.limit:
+                break
+            size -= length
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class CachedSieve:
+    """
+    Sieve of {first..last} assembled from cached blocks. Only blocks missing
+    from the cache are sieved (with SegmentedSieve windows) and then stored.
+    Primes are returned as an array('Q'), with `array` as a NumPy int64 array.
+    `trace` may wrap the iterator of blocks, e.g. to time every block.
+    """
+    def __init__(self, first: int, last: int, cache: Cache, array: bool = False) -> None:
+        self.first = first
+        self.last = last
+        self.cache = cache
+        self.array = array
+        self.width = 2 * SegmentedSieve.segment
+        self.sieve = None
+        self.bitmap = None
+        self.trace = None
+
+    def blocks(self):
+        """Yields (origin, bitmap) of the part of every block overlapping the range."""
+        stored = False
+        for k in range((self.first - 1) // self.width, (self.last - 1) // self.width + 1):
+            origin = k * self.width + 1
+            block = self.cache.load(k)
+            if block is None:
+                if self.sieve is None:
+                    self.sieve = SegmentedSieve(origin, (self.last - 1) // self.width * self.width + self.width)
+                block = self.sieve.window(origin, origin + self.width - 2)
+                self.cache.store(k, block)
+                stored = True
+            lo = max(self.first - origin, 0) // 16
+            hi = (min(self.last, origin + self.width) - origin) // 16 + 1
+            yield origin + 16 * lo, block[lo:hi]
+            if isinstance(block, mmap.mmap):
+                block.close()
+        if stored:
+            self.cache.evict()
+
+    def primes(self):
+        """Primes of the range; when it starts at 1 the whole bitmap is kept as `bitmap`."""
+        head = [2] if self.first <= 2 <= self.last else []
+        bitmaps = [] if self.first <= 2 else None
+        blocks = self.blocks() if self.trace is None else self.trace(self.blocks())
+        if self.array:
+            numpy = vector.numpy
+            parts = [numpy.array(head, dtype = numpy.int64)]
+            for origin, bitmap in blocks:
+                if bitmaps is not None: bitmaps.append(bitmap)
+                bits = numpy.unpackbits(numpy.frombuffer(bitmap, dtype = numpy.uint8), bitorder = "little")
+                parts.append(2 * numpy.flatnonzero(bits) + origin)
+            primes = numpy.concatenate(parts)
+            if bitmaps is not None: self.bitmap = bytearray(b"".join(bitmaps))
+            lo = numpy.searchsorted(primes, self.first)
+            hi = numpy.searchsorted(primes, self.last, side = "right")
+            return primes[lo:hi]
+        primes = array("Q", head)
+        for origin, bitmap in blocks:
+            if bitmaps is not None: bitmaps.append(bitmap)
+            unpack(bitmap, origin, primes)
+        if bitmaps is not None: self.bitmap = bytearray(b"".join(bitmaps))
+        del primes[bisect_right(primes, self.last):]
+        del primes[:bisect_left(primes, self.first)]
+        return primes
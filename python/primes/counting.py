@@ -0,0 +1,87 @@
+import math
+from sieve import BitSieve, SegmentedSieve, popcount, unpack
+import vector
+
+# above this 𝑥 the table is updated with NumPy array operations (when installed)
+vectorize = 10 ** 8
+# ranges narrower than narrow·∛𝑦 are counted in segmented sieve windows, which is faster there: π(𝑦) takes
+# about 4·10⁻⁹·𝑦^¾ s (NumPy), a window about as long as crossing off its numbers and the base primes up to √𝑦
+narrow = 12000
+
+def pi(x: int) -> int:
+    """Number of primes ≤ 𝑥 without sieving up to 𝑥, from Lucy_Hedgehog's table."""
+    if x < 2:
+        return 0
+    small, large = vector.lucy(x) if vector.numpy is not None and x > vectorize else lucy(x)
+    return int(large[1])
+
+def count(first: int, last: int) -> int:
+    """Number of primes in {first..last}: π(last) - π(first - 1), or popcounts of sieved windows for narrow ranges."""
+    if is_narrow(first, last):
+        windows = SegmentedSieve(first, last).windows()
+        return sum(popcount(window) for origin, window in windows) + (first <= 2 <= last)
+    return pi(last) - pi(first - 1)
+
+def sigma(x: int) -> int:
+    """Sum of primes ≤ 𝑥 without sieving up to 𝑥, from Lucy_Hedgehog's table of sums."""
+    if x < 2:
+        return 0
+    if vector.numpy is not None and x > vectorize:
+        return vector.lucy_sum(x)
+    small, large = lucy(x, sums = True)
+    return large[1]
+
+def total(first: int, last: int) -> int:
+    """Sum of primes in {first..last}: σ(last) - σ(first - 1), or sums of sieved windows for narrow ranges."""
+    if is_narrow(first, last):
+        windows = SegmentedSieve(first, last).windows()
+        return sum(sum(unpack(window, origin)) for origin, window in windows) + 2 * (first <= 2 <= last)
+    return sigma(last) - sigma(first - 1)
+
+def count_total(first: int, last: int) -> tuple:
+    """Number and sum of primes in {first..last} from one pass: one table of both at each end, or the same windows."""
+    if is_narrow(first, last):
+        count = total = 0
+        for origin, window in SegmentedSieve(first, last).windows():
+            count += popcount(window)
+            total += sum(unpack(window, origin))
+        two = first <= 2 <= last
+        return count + two, total + 2 * two
+    (a, b), (c, d) = pi_sigma(last), pi_sigma(first - 1)
+    return a - c, b - d
+
+def pi_sigma(x: int) -> tuple:
+    """(π(𝑥), σ(𝑥)), with NumPy from a single pass updating both tables."""
+    if vector.numpy is not None and x > vectorize:
+        return vector.lucy_sum(x, counts = True)
+    return pi(x), sigma(x)
+
+def is_narrow(first: int, last: int) -> bool:
+    return last - first < narrow * last ** (1 / 3)
+
+def lucy(x: int, sums: bool = False):
+    """
+    Lucy_Hedgehog's table of π(𝑣) for every 𝑣 = ⌊𝑥/𝑖⌋, in 𝑂(𝑥^¾) time and 𝑂(√𝑥) memory:
+    small[𝑣] = π(𝑣) for 𝑣 ≤ √𝑥 and large[𝑖] = π(⌊𝑥/𝑖⌋) for 𝑖 ≤ √𝑥. Starting from 𝑣 - 1 numbers ≥ 2,
+    every prime 𝑝 ≤ √𝑥 removes the π(⌊𝑣/𝑝⌋) - π(𝑝-1) numbers ≤ 𝑣 whose least prime factor is 𝑝.
+    Each step builds whole slices from the previous values, which is what the update needs.
+    With `sums` the table holds sums of primes instead: it starts from 2 + 3 + ... + 𝑣 and the
+    removed numbers 𝑝·𝑚 weigh 𝑝 times the sum of their cofactors 𝑚.
+    """
+    r = math.isqrt(x)
+    if sums:
+        small = [v * (v + 1) // 2 - 1 for v in range(r + 1)]
+        large = [0] + [(x // i) * (x // i + 1) // 2 - 1 for i in range(1, r + 1)]
+    else:
+        small = list(range(-1, r))
+        large = [0] + [x // i - 1 for i in range(1, r + 1)]
+    for p in BitSieve(r).primes():
+        sp = small[p - 1]
+        w = p if sums else 1
+        lim = min(r, x // (p * p))
+        k = min(lim, r // p)
+        large[1:k + 1] = [a - w * (b - sp) for a, b in zip(large[1:k + 1], large[p:k * p + 1:p])]
+        large[k + 1:lim + 1] = [a - w * (small[x // (i * p)] - sp) for i, a in zip(range(k + 1, lim + 1), large[k + 1:lim + 1])]
+        if p * p <= r:
+            small[p * p:] = [a - w * (small[v // p] - sp) for v, a in zip(range(p * p, r + 1), small[p * p:])]
+    return small, large
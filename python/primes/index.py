@@ -0,0 +1,65 @@
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from sieve import popcount
+
+POPCOUNT = bytes(bin(b).count("1") for b in range(256))
+
+class Index:
+    """
+    Queries on the bit-packed, odd-only bitmap of {0..last} (bit k stands for 2k+1).
+    Prefix counts of primes are kept for every `block` bytes, so is_prime is a bit test,
+    pi(𝑥) adds one partial-block popcount to a prefix count and the 𝑛-th prime
+    is found by bisecting the prefix counts and scanning a single block.
+    With `known`, an Index of the same bitmap before it grew, its prefix counts
+    of the blocks which have not changed are reused.
+    """
+    block = 64
+
+    def __init__(self, bitmap, last: int, known: "Index" = None) -> None:
+        self.bitmap = bitmap
+        self.last = last
+        start = 0 if known is None else min((known.last + 1) // 16 // self.block, len(known.counts) - 1)
+        blocks = range(start * self.block, len(bitmap), self.block)
+        initial = 0 if known is None else known.counts[start]
+        self.counts = array("Q", accumulate((popcount(bitmap[a:a + self.block]) for a in blocks), initial = initial))
+        if start:
+            self.counts = known.counts[:start] + self.counts
+        self.count = self.pi(last)
+
+    def is_prime(self, n: int) -> bool:
+        if n < 3 or n % 2 == 0 or n > self.last:
+            return n == 2 and self.last >= 2
+        k = n // 2
+        return self.bitmap[k >> 3] >> (k & 7) & 1 == 1
+
+    def pi(self, x: int) -> int:
+        """Number of primes ≤ 𝑥 (for 𝑥 ≤ last)."""
+        x = min(x, self.last)
+        if x < 2:
+            return 0
+        bits = (x + 1) // 2
+        byte, rest = bits >> 3, bits & 7
+        block = byte // self.block
+        count = 1 + self.counts[block] + popcount(self.bitmap[block * self.block:byte])
+        if rest:
+            count += POPCOUNT[self.bitmap[byte] & ((1 << rest) - 1)]
+        return count
+
+    def nth(self, n: int):
+        """The 𝑛-th prime, or False when it is beyond last."""
+        if n < 1 or n > self.count:
+            return False
+        if n == 1:
+            return 2
+        n -= 1
+        block = bisect_left(self.counts, n) - 1
+        count = self.counts[block]
+        for byte in range(block * self.block, len(self.bitmap)):
+            value = self.bitmap[byte]
+            if count + POPCOUNT[value] >= n:
+                for bit in range(8):
+                    count += value >> bit & 1
+                    if count == n:
+                        return 2 * (8 * byte + bit) + 1
+            count += POPCOUNT[value]
@@ -0,0 +1,200 @@
+import math
+from collections import Counter
+from itertools import accumulate, compress, count, repeat
+from operator import gt, mul, sub
+
+class Moments:
+    """
+    Mergeable accumulator of count, Σ𝑥, Σ𝑥², min and max kept as exact integers.
+    Mean and variances follow from count, Σ𝑥 and Σ𝑥², so the data is read once,
+    accumulators of segments or workers can be merged, and the results match
+    the statistics module (exact until the final rounding).
+    """
+    def __init__(self, values = ()) -> None:
+        self.count = 0
+        self.sum = 0
+        self.squares = 0
+        self.min = None
+        self.max = None
+        self.add(values)
+
+    def add(self, values) -> None:
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.sum += sum(values)
+        self.squares += sum(map(mul, values, values))
+        self.extremes(min(values), max(values))
+
+    def merge(self, other: "Moments") -> "Moments":
+        if other.count:
+            self.count += other.count
+            self.sum += other.sum
+            self.squares += other.squares
+            self.extremes(other.min, other.max)
+        return self
+
+    def extremes(self, low, high) -> None:
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def mean(self):
+        return ratio(self.sum, self.count)
+
+    def deviations(self) -> int:
+        """𝑛 times the sum of squared deviations from the mean: 𝑛Σ𝑥² - (Σ𝑥)²."""
+        return self.count * self.squares - self.sum ** 2
+
+    def pvariance(self):
+        return ratio(self.deviations(), self.count ** 2)
+
+    def variance(self):
+        return ratio(self.deviations(), self.count * (self.count - 1))
+
+    def pstdev(self) -> float:
+        return sqrt(self.deviations(), self.count ** 2)
+
+    def stdev(self) -> float:
+        return sqrt(self.deviations(), self.count * (self.count - 1))
+
+class GapCounter(dict):
+    """
+    Gap histogram of consecutive primes, built in one pass: each gap length maps to
+    [count, lower prime of its first pair, lower prime of its last pair],
+    in order of first occurrence. Memory depends on the number of gap lengths only.
+    """
+    chunk = 1 << 16
+
+    def add(self, primes) -> None:
+        """Adds the gaps between sorted primes, chunk by chunk with C-level map, Counter and dict(zip)."""
+        for a in range(0, len(primes) - 1, self.chunk):
+            uppers = primes[a + 1:a + self.chunk + 1]
+            lowers = primes[a:a + len(uppers)]
+            gaps = list(map(sub, uppers, lowers))
+            firsts = dict(zip(reversed(gaps), reversed(lowers)))
+            lasts = dict(zip(gaps, lowers))
+            counts = Counter(gaps)
+            for gap in sorted(firsts, key = firsts.get):
+                self.tally(gap, counts[gap], firsts[gap], lasts[gap])
+
+    def record(self, gap: int, lower: int) -> None:
+        self.tally(gap, 1, lower, lower)
+
+    def merge(self, other: "GapCounter") -> None:
+        """Appends gaps of primes following those already counted."""
+        for gap, (count, first, last) in other.items():
+            self.tally(gap, count, first, last)
+
+    def tally(self, gap: int, count: int, first: int, last: int) -> None:
+        if gap in self:
+            self[gap][0] += count
+            self[gap][2] = last
+        else:
+            self[gap] = [count, first, last]
+
+class Constellations:
+    """
+    Mergeable counts of prime constellations and maximal-gap records, found in one pass
+    over sorted primes. Constellations are patterns of gaps between consecutive primes,
+    counted with bytes.count in the gaps encoded as bytes; `head` and `tail` keep
+    the primes needed to match patterns across chunks and segments.
+    `records` are (gap, lower prime) of every gap longer than all gaps before it.
+    """
+    chunk = 1 << 16
+    keep = 3
+    # name: gap patterns of consecutive primes making up the constellation
+    patterns = {
+        "twins": ((2,),),                   # (𝑝, 𝑝+2)
+        "cousins": ((4,), (2, 2)),          # (𝑝, 𝑝+4), (3, 7) with 5 between
+        "sexy": ((6,), (2, 4), (4, 2)),     # (𝑝, 𝑝+6), with 𝑝+2 or 𝑝+4 prime between
+        "triplets": ((2, 4), (4, 2)),       # (𝑝, 𝑝+2, 𝑝+6) and (𝑝, 𝑝+4, 𝑝+6)
+        "quadruplets": ((2, 4, 2),),        # (𝑝, 𝑝+2, 𝑝+6, 𝑝+8)
+    }
+    codes = {name: tuple(map(bytes, alternatives)) for name, alternatives in patterns.items()}
+
+    def __init__(self, primes = ()) -> None:
+        self.counts = dict.fromkeys(self.patterns, 0)
+        self.records = []
+        self.head = ()
+        self.tail = ()
+        self.add(primes)
+
+    def add(self, primes) -> None:
+        """Adds sorted primes following those already counted, chunk by chunk."""
+        for a in range(0, len(primes), self.chunk):
+            part = primes[a:a + self.chunk]
+            part = part.tolist() if hasattr(part, "tolist") else list(part)
+            self.scan(list(self.tail) + part, len(self.tail), True)
+            self.head = (self.head + tuple(part[:self.keep]))[:self.keep]
+            self.tail = (self.tail + tuple(part[-self.keep:]))[-self.keep:]
+
+    def merge(self, other: "Constellations") -> "Constellations":
+        """Appends constellations of primes following those already counted."""
+        if self.tail and other.head:
+            self.scan(list(self.tail) + list(other.head), len(self.tail), False)
+            for name in self.counts:
+                self.counts[name] += other.counts[name]
+            longest = self.records[-1][0] if self.records else 0
+            self.records += [record for record in other.records if record[0] > longest]
+        elif other.head:
+            self.counts = dict(other.counts)
+            self.records = list(other.records)
+        self.head = (self.head + other.head)[:self.keep]
+        self.tail = (self.tail + other.tail)[-self.keep:]
+        return self
+
+    def scan(self, primes: list, old: int, inside: bool) -> None:
+        """
+        Counts patterns over the first new gap, primes[old - 1]..primes[old], and with `inside`
+        those after it too; `records` get the new gaps longer than the longest one so far.
+        """
+        gaps = list(map(sub, primes[1:], primes[:-1]))
+        if not gaps:
+            return
+        top = max(gaps)
+        codes = bytes(map(min, gaps, repeat(255))) if top > 255 else bytes(gaps)
+        edge = max(old - 1, 0)
+        for name, patterns in self.codes.items():
+            for pattern in patterns:
+                if inside:
+                    self.counts[name] += occurrences(codes, pattern, edge + 1)
+                starts = range(max(edge - len(pattern) + 1, 0), edge + 1)
+                self.counts[name] += sum(codes.startswith(pattern, start) for start in starts)
+        longest = self.records[-1][0] if self.records else 0
+        if top > longest:
+            new = gaps[edge:] if inside else gaps[edge:edge + 1]
+            lowers = primes[edge:]
+            for i in compress(count(), map(gt, new, accumulate(new, max, initial = longest))):
+                self.records.append((new[i], lowers[i]))
+
+def occurrences(codes: bytes, pattern: bytes, start: int = 0) -> int:
+    """Number of occurrences of the pattern in codes[start:], overlapping ones included."""
+    if not any(pattern[:k] == pattern[-k:] for k in range(1, len(pattern))):
+        return codes.count(pattern, start)
+    n = 0
+    i = codes.find(pattern, start)
+    while i >= 0:
+        n += 1
+        i = codes.find(pattern, i + 1)
+    return n
+
+def ratio(n: int, m: int):
+    """𝑛/𝑚 as an int when exact, otherwise as a correctly rounded float."""
+    return n // m if n % m == 0 else n / m
+
+def sqrt(n: int, m: int) -> float:
+    """Correctly rounded √(𝑛/𝑚), computed in integers with round-to-odd like the statistics module."""
+    q = (n.bit_length() - m.bit_length() - 109) // 2
+    if q >= 0:
+        m <<= 2 * q
+    else:
+        n <<= -2 * q
+    a = math.isqrt(n // m)
+    a |= a * a * m != n
+    return float(a << q) if q >= 0 else a / (1 << -q)
+
+def median(list, lo: int = 0, hi: int = None):
+    """Median of the sorted slice list[lo:hi], found by index, as a Python number also for NumPy arrays."""
+    hi = len(list) if hi is None else hi
+    i = lo + (hi - lo) // 2
+    return int(list[i]) if (hi - lo) % 2 else (int(list[i - 1]) + int(list[i])) / 2
@@ -0,0 +1,67 @@
+import json, sys
+from array import array
+from sieve import iter_primes
+
+# number of primes formatted and written at once
+chunk = 1 << 16
+
+def chunks(p):
+    """Primes of the range in lists of up to `chunk`, re-sieved window by window when they are not kept."""
+    if p.range.list is None:
+        for primes in iter_primes(p.request.first, p.request.last, "array"):
+            for a in range(0, len(primes), chunk):
+                yield primes[a:a + chunk].tolist()
+        return
+    for a in range(0, p.range.count, chunk):
+        yield p.range.list[a:a + chunk].tolist()
+
+def write_csv(p, file) -> None:
+    """Rows of index and prime, or of primes only when indexes are not known."""
+    index = p.range.first.index
+    file.write("index,prime\n" if index else "prime\n")
+    for primes in chunks(p):
+        if index:
+            file.write("".join(f"{i},{q}\n" for i, q in zip(range(index, index + len(primes)), primes)))
+            index += len(primes)
+        else:
+            file.write("".join(f"{q}\n" for q in primes))
+
+def write_ndjson(p, file) -> None:
+    """One object per prime, with its index when known."""
+    index = p.range.first.index
+    for primes in chunks(p):
+        if index:
+            file.write("".join(f'{{"index": {i}, "prime": {q}}}\n' for i, q in zip(range(index, index + len(primes)), primes)))
+            index += len(primes)
+        else:
+            file.write("".join(f'{{"prime": {q}}}\n' for q in primes))
+
+def write_json(p, file) -> None:
+    head = {"first": p.request.first, "last": p.request.last, "count": p.range.count}
+    file.write(json.dumps(head)[:-1] + ', "primes": [')
+    separator = ""
+    for primes in chunks(p):
+        if primes:
+            file.write(separator + ", ".join(map(str, primes)))
+            separator = ", "
+    file.write("]}\n")
+
+def write_bin(p, file) -> None:
+    """Raw little-endian uint32 (uint64 when the range ends at or above 2³²), no header."""
+    code = "I" if p.request.last < 1 << 32 else "Q"
+    for primes in chunks(p):
+        numbers = array(code, primes)
+        if sys.byteorder == "big":
+            numbers.byteswap()
+        file.write(numbers.tobytes())
+
+formats = {"csv": write_csv, "ndjson": write_ndjson, "json": write_json, "bin": write_bin}
+
+def write(p, format: str, path: str = None) -> None:
+    """Writes all primes of the range in the given format to the file at `path` or to stdout."""
+    binary = format == "bin"
+    if path is None or path == "-":
+        formats[format](p, sys.stdout.buffer if binary else sys.stdout)
+        return
+    with open(path, "wb" if binary else "w", buffering = 1 << 20) as file:
+        formats[format](p, file)
@@ -0,0 +1,107 @@
+import math
+
+SMALL = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+PRIMORIAL = math.prod(SMALL)
+
+# (bound, bases): Miller–Rabin with these bases is exact for every 𝑛 < bound
+WITNESSES = (
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (9080191, (31, 73)),
+    (25326001, (2, 3, 5)),
+    (3215031751, (2, 3, 5, 7)),
+    (4759123141, (2, 7, 61)),
+    (1122004669633, (2, 13, 23, 1662803)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (18446744073709551616, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
+bound = WITNESSES[-1][0]
+
+def is_probable_prime(n: int) -> bool:
+    """
+    Miller–Rabin test after trial division by primes below 100.
+    Exact for 𝑛 < 3.3·10²⁴ (`bound`) thanks to deterministic witness sets, above that the
+    bases (with 2 among them) are followed by a strong Lucas test, i.e. the Baillie–PSW test,
+    which has no known counterexample.
+    """
+    if n < 2:
+        return False
+    if math.gcd(n, PRIMORIAL) != 1:
+        return n in SMALL
+    if n < 10201:
+        return True
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for limit, bases in WITNESSES:
+        if n < limit:
+            break
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1 or a % n == 0:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return n < bound or is_lucas_probable_prime(n)
+
+def is_lucas_probable_prime(n: int) -> bool:
+    """
+    Strong Lucas test of an odd 𝑛 with Selfridge's parameters: the first 𝐷 of 5, -7, 9, -11...
+    with Jacobi symbol (𝐷/𝑛) = -1, 𝑃 = 1 and 𝑄 = (1 - 𝐷)/4. With 𝑛 + 1 = 𝑑·2ˢ, 𝑛 passes when
+    𝑈_𝑑 ≡ 0 or 𝑉_(𝑑·2ʳ) ≡ 0 (mod 𝑛) for some 𝑟 < 𝑠. Squares have no such 𝐷 and are composite.
+    """
+    if math.isqrt(n) ** 2 == n:
+        return False
+    D = 5
+    while jacobi(D, n) != -1:
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+    d, s = n + 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U, V, Qk = U * V % n, (V * V - 2 * Qk) % n, Qk * Qk % n
+        if bit == "1":
+            U, V = (U + V) % n, (D * U + V) % n
+            U, V = (U + n * (U % 2)) // 2, (V + n * (V % 2)) // 2
+            Qk = Qk * Q % n
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V, Qk = (V * V - 2 * Qk) % n, Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+def jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (𝑎/𝑛) of an odd 𝑛 > 0."""
+    a, result = a % n, 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def is_prime(n: int) -> bool:
+    """Deterministic primality test for 𝑛 < 3.3·10²⁴, raises ValueError above."""
+    if n >= bound:
+        raise ValueError(f"{n} is too large for a deterministic test, use is_probable_prime")
+    return is_probable_prime(n)
+
+def are_primes(numbers) -> list:
+    """Batch variant of is_probable_prime: one bool for each of the numbers."""
+    return list(map(is_probable_prime, numbers))
@@ -0,0 +1,145 @@
+import sys, argparse, json, os, platform, subprocess, time
+from colored import Fore, Style
+from primes import Primes
+from sieve import engines
+
+fb = Fore.blue
+fy = Fore.yellow
+fg = Fore.green
+fr = Fore.red
+sr = Style.reset
+
+stages = tuple(Primes.outputs)
+
+def cases(args):
+    """Yields (name, first, last, options) of every benchmarked run."""
+    for exponent in args.sizes:
+        size = 10 ** exponent
+        for engine in args.engines:
+            if engine == "list" and exponent > 6: continue
+            yield f"{engine} low 10^{exponent}", 1, size, {"engine": engine}
+        if args.high + size - 1 <= Primes.max:
+            yield f"segmented high 10^{exponent}", args.high, args.high + size - 1, {}
+        if args.workers > 1:
+            yield f"parallel low 10^{exponent}", 1, size, {"workers": args.workers}
+            if args.high + size - 1 <= Primes.max:
+                yield f"parallel high 10^{exponent}", args.high, args.high + size - 1, {"workers": args.workers}
+
+def measure(first, last, options, args):
+    """Best of `repeat` runs with all stages, peak memory of every stage from one more traced run, or the errors."""
+    best = None
+    for _ in range(args.repeat):
+        p = Primes(first, last, cache = args.cache, stages = stages, **options)
+        if p.error:
+            return {"error": "; ".join(p.error)}
+        if best is None or p.time.total.diff < best.time.total.diff:
+            best = p
+    result = {
+        "count": best.range.count,
+        "seconds": best.time.total.diff,
+        "throughput": round(best.request.count / best.time.sieve.diff) if best.time.sieve.diff else None,
+        "stages": {stage: getattr(best.time, stage).diff for stage in stages},
+    }
+    if args.memory:
+        p = Primes(first, last, cache = args.cache, stages = stages, memory = True, **options)
+        result["memory"] = max(getattr(p.time, stage).memory for stage in stages)
+        result["stages_memory"] = {stage: getattr(p.time, stage).memory for stage in stages}
+    return result
+
+def startup(args):
+    """Best wall time of `primes-cli.py 100` in a new interpreter, cumulative times of its top-level imports from one more run."""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "primes-cli.py"), "100"]
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout = subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    report = subprocess.run(command[:1] + ["-X", "importtime"] + command[1:], stdout = subprocess.DEVNULL,
+        stderr = subprocess.PIPE, text = True).stderr
+    imports = {}
+    for line in report.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit() and not fields[2].startswith("   "):
+            imports[fields[2].strip()] = int(fields[1]) / 10**6
+    slowest = dict(sorted(imports.items(), key = lambda item: -item[1])[:args.top])
+    return {"count": None, "seconds": best, "throughput": None, "imports": slowest}
+
+def compare(name, result, baseline, threshold):
+    """Names of metrics worse than in the baseline by more than `threshold`."""
+    old = baseline.get(name)
+    if old is None:
+        return []
+    worse = []
+    if result["seconds"] > old["seconds"] * (1 + threshold): worse.append("seconds")
+    if "memory" in result and "memory" in old and result["memory"] > old["memory"] * (1 + threshold): worse.append("memory")
+    return worse
+
+def print_result(name, result, baseline, worse, padding = 28):
+    line = f"{name.ljust(padding)}{fy}{result['seconds'] * 10**3:12.3f} ms{sr}"
+    if result["throughput"]: line += f"{result['throughput']:16,} n/s"
+    if "memory" in result: line += f"{result['memory'] / 2**20:10.2f} MiB"
+    if name in baseline:
+        change = result["seconds"] / baseline[name]["seconds"] - 1 if baseline[name]["seconds"] else 0
+        color = fr if worse else fg
+        line += f"  {color}{change:+.1%}{' ' + ', '.join(worse) if worse else ''}{sr}"
+    elif worse:
+        line += f"  {fr}{', '.join(worse)}{sr}"
+    print(line)
+
+def arguments():
+    parser = argparse.ArgumentParser(description = "Benchmark of Primes across range sizes, positions and sieve engines.")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = list(range(3, 9)), metavar = "K",
+        help = "exponents of range sizes 10^K (default 3..8, above 8 only with -w)")
+    parser.add_argument("--engines", nargs = "+", default = list(engines), choices = list(engines))
+    parser.add_argument("--high", type = int, default = 10 ** 12, help = "first number of high windows (default 10^12)")
+    parser.add_argument("-w", "--workers", type = int, default = 1, help = "also benchmark the parallel sieve")
+    parser.add_argument("-r", "--repeat", type = int, default = 3)
+    parser.add_argument("--cache", action = "store_true", help = "use cached blocks (not used by default)")
+    parser.add_argument("--no-memory", dest = "memory", action = "store_false", help = "do not trace peak memory")
+    parser.add_argument("--save", metavar = "FILE", help = "write results as JSON")
+    parser.add_argument("--baseline", metavar = "FILE", help = "compare with results saved before")
+    parser.add_argument("--startup", action = "store_true", help = "benchmark start-up time of `primes 100` instead")
+    parser.add_argument("--target", type = float, default = 30, help = "start-up time in ms flagged when exceeded (default 30)")
+    parser.add_argument("--top", type = int, default = 5, help = "slowest top-level imports shown with --startup")
+    parser.add_argument("--threshold", type = float, default = 0.2, help = "relative slowdown flagged as regression (default 0.2)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = arguments()
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+    results = {}
+    regressions = []
+    print(f"\n{fb}Python {platform.python_version()} on {platform.machine()}, best of {args.repeat}{sr}\n")
+    if args.startup:
+        name, result = "startup primes 100", startup(args)
+        results[name] = result
+        worse = compare(name, result, baseline, args.threshold)
+        if result["seconds"] * 10**3 > args.target: worse.append(f"over {args.target:g} ms")
+        if worse: regressions.append(name)
+        print_result(name, result, baseline, worse)
+        for module, seconds in result["imports"].items():
+            print(f"  import {module.ljust(26)}{seconds * 10**3:12.3f} ms")
+    else:
+        for name, first, last, options in cases(args):
+            result = measure(first, last, options, args)
+            if "error" in result:
+                print(f"{name.ljust(28)}{fr}skipped: {result['error']}{sr}")
+                continue
+            results[name] = result
+            worse = compare(name, result, baseline, args.threshold)
+            if worse: regressions.append(name)
+            print_result(name, result, baseline, worse)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, file, indent = 2)
+    if regressions:
+        print(f"\n{fr}✖{sr} {len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,4 @@
+#!/bin/bash
+
+python3 ./primes-bench.py $*
+if [ $? != 0 ]; then exit $?; else exit 0; fi
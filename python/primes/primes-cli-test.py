@@ -5,6 +5,7 @@ from primes import Primes
 fm = Fore.magenta
 fy = Fore.yellow
 fg = Fore.green
+fr = Fore.red
 sr = Style.reset
 
 def print_title(title: str, info: str = ""):
@@ -18,6 +19,7 @@ def print_value(name):
 def print_list(name):
     obj = "p"
     var = eval(f"{obj}.{name}")
+    if hasattr(var, "tolist"): var = var.tolist()
     if len(var) > 10: var = str(var[:5]) + " ... " + str(var[-5:])
     print(name.ljust(30), f" = {fy}{var}{sr}")
 
@@ -28,6 +30,11 @@ def print_cli(p):
     print_value("request.count")
     print_value("request.interval")
     
+    if p.all: print_all(p)
+    print_range(p)
+    print_rest(p)
+
+def print_all(p):
     print_title("All", f"(all primes up to {p.request.last})")
     print_value("all.first.name")
     print_value("all.first.symbol")
@@ -45,6 +52,7 @@ def print_cli(p):
     print_value("all.interval")
     print_list("all.list")
     
+def print_range(p):
     print_title("Range", f"(primes in requested range)")
     print_value("range.result")
     print_value("range.count")
@@ -63,6 +71,7 @@ def print_cli(p):
     print_value("range.last.sufix")
     print_value("range.last.indexs")
     
+def print_rest(p):
     print_title("Gaps")
     print_value("gaps.max.name")
     print_value("gaps.max.symbol")
@@ -179,12 +188,22 @@ def print_cli(p):
     print_value("time.total.value")
     print_value("time.unit")
 
+def print_counting(p) -> bool:
+    """Count and sum without sieving (count_only) next to the sieved ones, True when they agree."""
+    print_title("Counting", "(count_only, checked against the sieve)")
+    c = Primes(p.request.first, p.request.last, count_only = True, stages = ("sieve", "basics"))
+    agree = True
+    for name, counted, sieved in (("range.count", c.range.count, p.range.count), ("sum.value", c.sum.value, p.sum.value)):
+        agree = agree and counted == sieved
+        print(f"count_only.{name}".ljust(30), f" = {fy}{counted}{sr}", "" if counted == sieved else f"{fr}≠ {sieved}{sr}")
+    return agree
+
 if len(sys.argv) == 3:
     p = Primes(sys.argv[1], sys.argv[2])
 else:
     p = Primes(1, sys.argv[1])
 if not p.error:
     print_cli(p)
-    sys.exit(0)
+    sys.exit(0 if print_counting(p) else 1)
 else:
     sys.exit(1)
@@ -1,38 +1,52 @@
 import sys
-from colored import Fore, Back, Style
+from types import SimpleNamespace
 from primes import Primes
 
-fb = Fore.blue
-fm = Fore.magenta
-fy = Fore.yellow
-fg = Fore.green
-fr = Fore.red
-sb = Style.bold
-sr = Style.reset
+# colours only on a terminal, so that colored is not even imported for pipes and files
+if sys.stdout.isatty():
+    from colored import Fore, Style
+    fb = Fore.blue
+    fm = Fore.magenta
+    fy = Fore.yellow
+    fg = Fore.green
+    fr = Fore.red
+    sb = Style.bold
+    sr = Style.reset
+else:
+    fb = fm = fy = fg = fr = sb = sr = ""
 ok = f"{fg}✔{sr} "
 er = f"{fr}✖{sr} "
 
 stat = True
+formats = ("csv", "ndjson", "json", "bin")
+
+def pad(text: str, width: int) -> str:
+    """Left-justifies text to `width` visible characters, colour codes not counted."""
+    visible = text
+    for code in {fb, fm, fy, fg, fr, sb, sr} - {""}:
+        visible = visible.replace(code, "")
+    return text + " " * (width - len(visible))
 
 def print_primes():
     print(fm, end="")
     if p.range.count <= 10:
-        print(*p.range.list, "\n")
+        print(*p.range.head, *p.range.tail[len(p.range.head) + len(p.range.tail) - p.range.count:], "\n")
     else:
-        print(*p.range.list[:5], end="")
+        print(*p.range.head, end="")
         print(f" {sr}...{p.range.count - 10} more...{fm} ", end="")
-        print(*p.range.list[-5:], "\n")
+        print(*p.range.tail, "\n")
     print(sr, end="")
 
-def print_value(value, padding = 43):
-    name = f"{value.name} {fg}{value.symbol}{sr}".ljust(padding)
+def print_value(value, padding = 30):
+    if value.value is False: return
+    name = pad(f"{value.name} {fg}{value.symbol}{sr}", padding)
     print(f"{name}{fy}{value.value}{sr}")
 
-def print_list(value, padding = 43):
+def print_list(value, padding = 30):
     if hasattr(value, "form"):
-        name = f"{value.name}{fg} {value.form}{sr}".ljust(padding)
+        name = pad(f"{value.name}{fg} {value.form}{sr}", padding)
     else:
-        name = value.name.ljust(padding)
+        name = pad(value.name, padding)
     examples = f"({fm}" if value.count > 0 else ""
     match value.count:
         case 1: examples += f"{fm}{value.first}{sr}"
@@ -47,9 +61,9 @@ def print_list(value, padding = 43):
     examples += f"{sr})" if value.count > 0 else ""
     print(f"{name}{fy}{value.count}{sr} {examples}")
 
-def print_gaps(value, padding = 43):
+def print_gaps(value, padding = 30):
     if p.range.count > 2:
-        name = f"{value.name} {fg}{value.symbol}{sr}".ljust(padding)
+        name = pad(f"{value.name} {fg}{value.symbol}{sr}", padding)
         if value.count > 0:
             if value.count == 1:
                 examples = f"{fm}{value.first}{sr}"
@@ -59,32 +73,40 @@ def print_gaps(value, padding = 43):
                 examples = f"{fm}{value.first}{sr} {fg}...{value.count - 2} more...{sr} {fm}{value.last}{sr}"
             print(f"{name}{fy}{value.value}{sr} ({value.count_text}) {examples}")
     else:
-        name = f"Gap {fg}∆{sr}".ljust(padding)
+        name = pad(f"Gap {fg}∆{sr}", padding)
         print(f"{name}{fy}{value.value}{sr}")
 
-def print_prime(value, padding = 43):
+def print_records(value, padding = 30):
+    name = pad(f"{value.name} {fg}{value.form}{sr}", padding)
+    records = [f"{fy}{gap}{sr} after {fm}{p}{sr}" for gap, p in value.list]
+    if value.count > 6:
+        records[3:-3] = ["..."]
+    print(f"{name}{fy}{value.count}{sr} ({', '.join(records)})")
+
+def print_constellations(p):
+    print()
+    for value in (p.twins, p.cousins, p.sexy, p.triplets, p.quadruplets):
+        print_value(value)
+    if p.records.count > 0: print_records(p.records)
+
+def print_prime(value, padding = 30):
     if p.range.count > 1:
-        name = f"{value.name} {fg}{value.symbol}{sr}".ljust(padding)
-        print(f"{name}{fm}{value.value}{sr} ({fg}{value.indexs}{sr} prime)")
+        name = pad(f"{value.name} {fg}{value.symbol}{sr}", padding)
     else:
-        name = f"Prime number found".ljust(padding - 13)
-        print(f"{name}{fm}{value.value}{sr} ({fg}{value.indexs}{sr} prime)")
+        name = pad("Prime number found", padding)
+    index = f" ({fg}{value.indexs}{sr} prime)" if value.indexs else ""
+    print(f"{name}{fm}{value.value}{sr}{index}")
 
 def print_times(padding = 15):
-    sieve = p.time.sieve.name.ljust(padding)
-    print(f"\n{fb}{sieve}{p.time.sieve.value} {p.time.unit}{sr}")
-    gaps = p.time.gaps.name.ljust(padding)
-    print(f"{fb}{gaps}{p.time.gaps.value} {p.time.unit}{sr}")
-    basics = p.time.basics.name.ljust(padding)
-    print(f"{fb}{basics}{p.time.basics.value} {p.time.unit}{sr}")
-    stats = p.time.stats.name.ljust(padding)
-    print(f"{fb}{stats}{p.time.stats.value} {p.time.unit}{sr}")
-    weird = p.time.weird.name.ljust(padding)
-    print(f"{fb}{weird}{p.time.weird.value} {p.time.unit}{sr}")
+    print()
+    for item in (p.time.sieve, p.time.gaps, p.time.basics, p.time.stats, p.time.weird, p.time.constellations):
+        if item is False: continue
+        name = item.name.ljust(padding)
+        print(f"{fb}{name}{item.value} {p.time.unit}{sr}")
     total = p.time.total.name.ljust(padding)
     print(f"{fb}{sb}{total}{p.time.total.value} {p.time.unit}{sr}")
 
-def print_cli(p):
+def print_result(p):
     title = f"\n{Primes.str('title')} {fy}{p.request.interval}{sr}:\n"
     match p.range.count:
         case 0: result = f"{er}No primes found"
@@ -95,6 +117,15 @@ def print_cli(p):
 
     print(title)
     print(result)
+
+def print_count(p):
+    print_result(p)
+    print_value(p.pcent)
+    print_value(p.sum)
+    print_times()
+
+def print_cli(p):
+    print_result(p)
     if p.range.count > 0 and stat:
         print_primes()
         print_prime(p.range.first)
@@ -123,8 +154,35 @@ def print_cli(p):
             print_value(p.q1)
             print_value(p.q3)
             print_value(p.qi)
+        if "constellations" in p.stages: print_constellations(p)
     print_times()
     
+def print_profile(p, file):
+    import json
+    profile = {"request": {"first": p.request.first, "last": p.request.last},
+        "engine": p.engine, "sieved": p.sieved, "workers": p.workers, "cache": p.cache, **p.time.export()}
+    if file == "-":
+        print(json.dumps(profile, indent = 2))
+    else:
+        with open(file, "w") as output:
+            json.dump(profile, output, indent = 2)
+
+def print_batch(input, path, cache):
+    from batch import Batch
+    try:
+        if input == "-":
+            batch = Batch(sys.stdin, cache = cache)
+        else:
+            with open(input) as file:
+                batch = Batch(file, cache = cache)
+        output = sys.stdout if path is None or path == "-" else open(path, "w", buffering = 1 << 20)
+    except OSError as error:
+        print(f"\n{er} {Primes.str('argsf')} {error.filename}: {error.strerror}")
+        sys.exit(1)
+    batch.write(output)
+    if output is not sys.stdout:
+        output.close()
+
 def print_cli_errors(p):
     print("")
     for e in p.error:
@@ -138,25 +196,79 @@ def help():
         f"where x and y"
         + f" are positive natural numbers, 𝑥 ≥ 1, "
         + f"𝑦 ≥ 𝑥 and 𝑦 < {Primes.max}.",
+        f"Ranges above {Primes.span} are sieved in segments",
+        f"and must not span more than {Primes.span} numbers.\n",
+        "Options:",
+        f"\t{fy}-w N{sr}, {fy}--workers N{sr}\tsieve in N parallel processes (no limit on range width)",
+        f"\t{fy}--no-cache{sr}\t\tdo not read or store sieved blocks in ~/.cache/primes",
+        f"\t{fy}--profile FILE{sr}\twrite times of stages, segments and tasks as JSON (- for stdout)",
+        f"\t{fy}--memory{sr}\t\ttrace peak memory of every stage (slower)",
+        f"\t{fy}--count-only{sr}\t\tcount and sum primes without sieving (Lucy_Hedgehog's π(𝑥), fast up to 10¹³)",
+        f"\t{fy}-c{sr}, {fy}--constellations{sr}\tcount twin, cousin, sexy primes, triplets, quadruplets and gap records",
+        f"\t{fy}--format F{sr}\t\twrite all primes as {'|'.join(formats)} instead of the summary",
+        f"\t{fy}--output FILE{sr}\twrite them to FILE instead of stdout (format from its extension by default)",
+        f"\t{fy}--batch [FILE]{sr}\tanswer ranges \"x y\" listed one per line in FILE or stdin as NDJSON",
     ])
 
-args = len(sys.argv)
-
-match args:
-    case _ if args > 3:
-        print("\n" + Primes.er + Primes.help("argsm"))
-        sys.exit(2)
-    case 3:
-        p = Primes(sys.argv[1], sys.argv[2])
-    case 2:
-        p = Primes(1, sys.argv[1])
-    case _:
-        print(help())
-        sys.exit(0)
+def arguments():
+    # plain `primes x [y]` has no options to parse, so argparse (with re, gettext...) is not imported
+    if not any(arg.startswith("-") for arg in sys.argv[1:]):
+        return SimpleNamespace(numbers = sys.argv[1:], workers = 1, cache = True, profile = None,
+            memory = False, format = None, output = None, batch = None, constellations = False, count_only = False, help = False)
+    import argparse
+    parser = argparse.ArgumentParser(add_help = False)
+    parser.add_argument("numbers", nargs = "*")
+    parser.add_argument("-w", "--workers", type = int, default = 1)
+    parser.add_argument("--no-cache", dest = "cache", action = "store_false")
+    parser.add_argument("--profile", metavar = "FILE")
+    parser.add_argument("--memory", action = "store_true")
+    parser.add_argument("--format", choices = formats)
+    parser.add_argument("--output", metavar = "FILE")
+    parser.add_argument("--batch", metavar = "FILE", nargs = "?", const = "-")
+    parser.add_argument("-c", "--constellations", action = "store_true")
+    parser.add_argument("--count-only", action = "store_true")
+    parser.add_argument("-h", "--help", action = "store_true")
+    return parser.parse_args()
 
-if not p.error:
-    print_cli(p)
-    sys.exit(0)
-else:
-    print_cli_errors(p)
-    sys.exit(1)
+if __name__ == "__main__":
+    args = arguments()
+    stages = ("sieve", "constellations") if args.constellations else ("sieve", "basics") if args.count_only else None
+    if args.output and not args.format and not args.batch and not args.help:
+        args.format = args.output.rpartition(".")[2]
+        if args.format not in formats:
+            print(f"\n{er} {Primes.str('argso')}: {', '.join(formats)}")
+            sys.exit(2)
+
+    match len(args.numbers):
+        case _ if args.help:
+            print(help())
+            sys.exit(0)
+        case 0 if args.batch:
+            print_batch(args.batch, args.output, args.cache)
+            sys.exit(0)
+        case n if n > 2:
+            print(f"\n{er} {Primes.str('argsm')}")
+            sys.exit(2)
+        case 2:
+            p = Primes(args.numbers[0], args.numbers[1], workers = args.workers, cache = args.cache, memory = args.memory,
+                stages = stages, count_only = args.count_only)
+        case 1:
+            p = Primes(1, args.numbers[0], workers = args.workers, cache = args.cache, memory = args.memory,
+                stages = stages, count_only = args.count_only)
+        case _:
+            print(help())
+            sys.exit(0)
+
+    if not p.error:
+        if args.format:
+            import output
+            output.write(p, args.format, args.output)
+        elif args.count_only:
+            print_count(p)
+        else:
+            print_cli(p)
+        if args.profile: print_profile(p, args.profile)
+        sys.exit(0)
+    else:
+        print_cli_errors(p)
+        sys.exit(1)
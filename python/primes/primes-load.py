@@ -0,0 +1,60 @@
+import argparse, asyncio, random, time
+
+def target(args) -> str:
+    """Random query within {1..max}."""
+    match random.choice(args.endpoints):
+        case "is_prime": return f"/is_prime?n={random.randint(1, args.max)}"
+        case "pi": return f"/pi?x={random.randint(1, args.max)}"
+        case "nth_prime": return f"/nth_prime?n={random.randint(1, args.max // 20)}"
+        case "range":
+            first = random.randint(1, args.max - args.width)
+            return f"/range?first={first}&last={first + args.width}"
+
+async def client(args, stop: float, latencies: list, errors: list):
+    """One keep-alive connection sending requests one after another until `stop`."""
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    while time.perf_counter() < stop:
+        start = time.perf_counter_ns()
+        writer.write(f"GET {target(args)} HTTP/1.1\r\nHost: {args.host}\r\n\r\n".encode())
+        status = await reader.readline()
+        length = 0
+        while (header := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = header.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter_ns() - start)
+        if b" 200 " not in status:
+            errors.append(status)
+    writer.close()
+
+async def load(args):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args, start + args.duration, latencies, errors) for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    percentile = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] / 10**6
+    print(f"{len(latencies)} requests in {elapsed:.2f} s over {args.connections} connections, {len(errors)} errors")
+    print(f"QPS: {len(latencies) / elapsed:.0f}")
+    if latencies:
+        print(f"Latency: p50 {percentile(0.5):.3f} ms, p90 {percentile(0.9):.3f} ms, p99 {percentile(0.99):.3f} ms, max {latencies[-1] / 10**6:.3f} ms")
+
+def arguments():
+    parser = argparse.ArgumentParser(description = "Load test of primes-server.py: random queries over keep-alive connections.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8000)
+    parser.add_argument("--unix", metavar = "PATH")
+    parser.add_argument("-c", "--connections", type = int, default = 16)
+    parser.add_argument("-d", "--duration", type = float, default = 5.0, help = "seconds (default 5)")
+    parser.add_argument("--max", type = int, default = 10 ** 6, help = "queried numbers are up to MAX (default 10^6)")
+    parser.add_argument("--width", type = int, default = 1000, help = "width of queried ranges (default 1000)")
+    parser.add_argument("--endpoints", nargs = "+", default = ["is_prime", "pi", "nth_prime", "range"],
+        choices = ["is_prime", "pi", "nth_prime", "range"])
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(load(arguments()))
@@ -0,0 +1,94 @@
+import sys, argparse, asyncio, json
+from urllib.parse import parse_qs, urlsplit
+from batch import describe
+from warm import Warm
+
+# endpoint: (method of Warm, names of its integer parameters)
+routes = {
+    "/is_prime": ("is_prime", ("n",)),
+    "/pi": ("pi", ("x",)),
+    "/nth_prime": ("nth", ("n",)),
+    "/range": ("range", ("first", "last")),
+}
+# ranges wider than this are described (gaps counted) in a worker thread, so other clients are served meanwhile
+wide = 1 << 20
+
+async def answer(warm: Warm, target: str):
+    """(HTTP status, JSON body) for a request target like /pi?x=1000."""
+    url = urlsplit(target)
+    if url.path == "/status":
+        return 200, {"last": warm.last, "count": warm.index.count, "bytes": len(warm.bitmap)}
+    if url.path not in routes:
+        return 404, {"error": f"Unknown endpoint {url.path}, use one of: /status, {', '.join(routes)}"}
+    method, names = routes[url.path]
+    query = parse_qs(url.query)
+    try:
+        values = [int(query[name][0]) for name in names]
+    except (KeyError, ValueError):
+        return 400, {"error": f"Integer parameters required: {', '.join(names)}"}
+    if any(value < 1 for value in values) or (method == "range" and values[0] > values[1]):
+        return 400, {"error": "Parameters must be positive and first ≤ last"}
+    try:
+        if method == "range" and values[1] - values[0] >= wide:
+            result = await asyncio.to_thread(describe, *values, *warm.select(*values))
+        else:
+            result = getattr(warm, method)(*values)
+    except ValueError as error:
+        return 400, {"error": str(error)}
+    if isinstance(result, dict):
+        return 200, result
+    return 200, {**dict(zip(names, values)), url.path[1:]: result}
+
+async def handle(warm: Warm, reader, writer):
+    """HTTP/1.1 with keep-alive: GET requests are answered in order until the client closes."""
+    try:
+        while line := await reader.readline():
+            close = False
+            while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = header.decode("latin-1").partition(":")
+                if name.strip().lower() == "connection" and value.strip().lower() == "close":
+                    close = True
+            try:
+                method, target, version = line.decode("latin-1").split()
+            except ValueError:
+                break
+            status, body = await answer(warm, target) if method == "GET" else (405, {"error": "Only GET is supported"})
+            close = close or version != "HTTP/1.1"
+            data = json.dumps(body).encode()
+            writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n%s\r\n" % (
+                status, {200: b"OK", 400: b"Bad Request", 404: b"Not Found", 405: b"Method Not Allowed"}[status],
+                len(data), b"Connection: close\r\n" if close else b"") + data)
+            await writer.drain()
+            if close:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(args):
+    warm = Warm(args.warm)
+    if args.unix:
+        server = await asyncio.start_unix_server(lambda r, w: handle(warm, r, w), args.unix)
+        where = args.unix
+    else:
+        server = await asyncio.start_server(lambda r, w: handle(warm, r, w), args.host, args.port)
+        where = f"http://{args.host}:{args.port}"
+    print(f"Serving primes up to {warm.last} (growing up to {warm.limit}) on {where}", file = sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+def arguments():
+    parser = argparse.ArgumentParser(description = "Local server answering /is_prime?n=, /pi?x=, "
+        "/nth_prime?n=, /range?first=&last= and /status from a warm sieve.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8000)
+    parser.add_argument("--unix", metavar = "PATH", help = "listen on a Unix socket instead")
+    parser.add_argument("--warm", type = int, default = 1 << 20, metavar = "N", help = "sieve up to N on start")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(arguments()))
+    except KeyboardInterrupt:
+        pass
@@ -1,18 +1,41 @@
-import math, time, statistics as stat
+import math, time
+from array import array
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from moments import Constellations, GapCounter, Moments, median
+import vector
+from cache import Cache, CachedSieve
+from sieve import append, engines, BitSieve, iter_primes, pack, unpack, ParallelSieve, SegmentedSieve
+from index import Index
+import counting, primality
 
 class Param:
+    """Named result value; `info` is formatted only when it is read."""
+    __slots__ = ("value", "name")
+
     def __init__(self, value, name):
         self.value = value
         self.name = name
-        self.info = f"{self.name}: {self.value}"
+
+    @property
+    def info(self):
+        return f"{self.name}: {self.value}"
 
 class ParamStat(Param):
+    __slots__ = ("symbol",)
+
     def __init__(self, value, name, symbol):
         super().__init__(value, name)
         self.symbol = symbol
-        self.info = f"{self.name} ({self.symbol}): {self.value}"
+
+    @property
+    def info(self):
+        return f"{self.name} ({self.symbol}): {self.value}"
 
 class ParamList(Param):
+    __slots__ = ("list", "count", "form", "first", "last")
+
     def __init__(self, list, name, form = ""):
         super().__init__(False, name)
         self.list = list
@@ -20,98 +43,255 @@ class ParamList(Param):
         self.form = form
         self.first = list[0] if self.count > 0 else False
         self.last = list[-1] if self.count > 0 else False
-        self.info = f"{self.name}: {self.count}"
+
+    @property
+    def info(self):
+        return f"{self.name}: {self.count}"
 
 class ParamGaps(ParamStat):
+    __slots__ = ("list", "count", "first", "last", "more")
+
     def __init__(self, value, list, name, symbol):
         super().__init__(value, name, symbol)
         self.list = list
         self.count = len(list)
         if self.count > 0:
-            self.count_text = "1 time" if self.count == 1 else f"{self.count} times"
             self.first = f"{{{list[0][0]}, {list[0][1]}}}"
             self.last = f"{{{list[-1][0]}, {list[-1][1]}}}"
             self.more = self.count - 2 if self.count > 3 else False
         else:
-            self.count_text = ""
             self.first = False
             self.last = False
             self.more = False
 
+    @property
+    def count_text(self):
+        if self.count == 0:
+            return ""
+        return "1 time" if self.count == 1 else f"{self.count} times"
+
+class Pairs:
+    """
+    Lazy tuple of (𝑝, 𝑞) pairs of consecutive primes 𝑞 - 𝑝 = gap.
+    Count and the first and last pair come from a GapCounter, all pairs are found
+    by scanning the primes only when the tuple is iterated or sliced.
+    Without the primes (sieve summaries) only the first and last pair are known,
+    other pairs, iterating and slicing raise ValueError.
+    """
+    __slots__ = ("primes", "gap", "count", "ends", "pairs")
+
+    def __init__(self, primes, gap: int, count: int, first: int, last: int) -> None:
+        self.primes = primes
+        self.gap = gap
+        self.count = count
+        self.ends = ((first, first + gap), (last, last + gap))
+        self.pairs = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i):
+        if i == 0 or i == -self.count:
+            return self.ends[0]
+        if i == -1 or i == self.count - 1:
+            return self.ends[1]
+        return self.tuple()[i]
+
+    def __iter__(self):
+        return iter(self.tuple())
+
+    def __repr__(self) -> str:
+        return repr(self.tuple())
+
+    def tuple(self) -> tuple:
+        if self.pairs is None:
+            if self.primes is None:
+                if self.count > 2:
+                    raise ValueError(f"{Primes.str('g_sum')} ({self.count} pairs)")
+                self.pairs = self.ends[:self.count]
+            elif vector.is_array(self.primes):
+                self.pairs = vector.pairs(self.primes, self.gap)
+            else:
+                uppers = islice(self.primes, 1, None)
+                self.pairs = tuple((p, q) for p, q in zip(self.primes, uppers) if q - p == self.gap)
+        return self.pairs
+
 class Prime(ParamStat):
+    __slots__ = ("index",)
+
     def __init__(self, value, name, symbol, index):
         super().__init__(value, name, symbol)
-        if value:
-            self.index = index
-            self.sufix = self.sfx(index)
-            self.indexs = f"{index}{self.sufix}"
-        else:
-            self.index = False
-            self.sufix = False
-            self.indexs = False
-        self.info = f"{self.name}: {self.symbol} = {self.value} ({self.indexs} prime)"
+        self.index = index if value and index else False
+
+    @property
+    def sufix(self):
+        return self.sfx(self.index) if self.index else False
+
+    @property
+    def indexs(self):
+        return f"{self.index}{self.sufix}" if self.index else False
+
+    @property
+    def info(self):
+        return f"{self.name}: {self.symbol} = {self.value} ({self.indexs} prime)"
+
     def sfx(self, n: int):
         return "%s"%({1:"st",2:"nd",3:"rd"}.get(n%100 if (n%100)<20 else n%10,"th"))
 
 class TimerItem:
-    def __init__(self, start: float, stop: float, name: str):
+    """Span between two perf_counter_ns readings, with peak traced memory (False when not traced) and sub-spans."""
+    __slots__ = ("name", "start", "stop", "diff", "value", "memory", "spans")
+
+    def __init__(self, start: int, stop: int, name: str, memory = False):
         self.name = name
         self.start = start
         self.stop = stop
-        self.diff = stop - start
-        self.value = round(self.diff * 10**3, 4)
-        self.info = f"{self.name}: {self.value} ms"
+        self.diff = (stop - start) / 10**9
+        self.value = round((stop - start) / 10**6, 4)
+        self.memory = memory
+        self.spans = []
+
+    @property
+    def info(self):
+        return f"{self.name}: {self.value} ms"
+
+    def export(self) -> dict:
+        span = {"name": self.name, "start": self.start, "ns": self.stop - self.start}
+        if self.memory is not False: span["memory"] = self.memory
+        if self.spans: span["spans"] = [item.export() for item in self.spans]
+        return span
 
 class Timer:
-    def __init__(self):
-        self.start = time.time()
+    """
+    Spans of the stages which have run (False for those which have not) and their total.
+    Stages may hold nested spans (segments, cached blocks, worker tasks); with `memory`
+    the peak of memory allocated during every span is traced with tracemalloc.
+    """
+    names = {"sieve": "timep", "gaps": "timeg", "basics": "timeb", "stats": "times", "weird": "timew",
+        "constellations": "timec"}
+
+    def __init__(self, memory: bool = False):
+        self.start = time.perf_counter_ns()
         self.unit = "ms"
-    def sieve(self):
-        self.sieve = time.time()
-    def gaps(self):
-        self.gaps = time.time()
-    def basics(self):
-        self.basics = time.time()
-    def stats(self):
-        self.stats = time.time()
-    def weird(self):
-        self.weird = time.time()
-    def stop(self):
-        self.sieve = TimerItem(self.start, self.sieve, Primes.str("timep"))
-        self.gaps = TimerItem(self.sieve.stop, self.gaps, Primes.str("timeg"))
-        self.basics = TimerItem(self.gaps.stop, self.basics, Primes.str("timeb"))
-        self.stats = TimerItem(self.basics.stop, self.stats, Primes.str("times"))
-        self.weird = TimerItem(self.stats.stop, self.weird, Primes.str("timew"))
-        self.total = TimerItem(self.start, time.time(), Primes.str("timet"))
+        self.memory = memory
+        self.tracing = False
+        self.spans = []
+        self.open = []
+        self.last = None
+        for stage in self.names:
+            setattr(self, stage, False)
+        self.total = TimerItem(self.start, self.start, Primes.str("timet"))
+
+    @contextmanager
+    def stage(self, stage: str):
+        with self.span(Primes.str(self.names[stage])):
+            yield
+        setattr(self, stage, self.last)
+        elapsed = sum(item.stop - item.start for item in self.spans)
+        self.total = TimerItem(self.start, self.start + elapsed, Primes.str("timet"))
+
+    @contextmanager
+    def span(self, name: str):
+        if self.memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.tracing = True
+            if self.open:
+                self.open[-1][3] = max(self.open[-1][3], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frame = [name, time.perf_counter_ns(), [], 0]
+        self.open.append(frame)
+        try:
+            yield
+        finally:
+            self.open.pop()
+            stop = time.perf_counter_ns()
+            memory = max(frame[3], tracemalloc.get_traced_memory()[1]) if self.memory else False
+            item = TimerItem(frame[1], stop, name, memory)
+            item.spans = frame[2]
+            self.attach(item)
+            if self.tracing and not self.open:
+                tracemalloc.stop()
+                self.tracing = False
+
+    def record(self, name: str, start: int, stop: int):
+        """Adds a span measured elsewhere (e.g. in a worker process) to the open span."""
+        self.attach(TimerItem(start, stop, name))
+
+    def each(self, iterable, name: str):
+        """Yields items of the iterable, timing the production of every item as a sub-span."""
+        start = time.perf_counter_ns()
+        for i, item in enumerate(iterable, 1):
+            self.record(f"{name} {i}", start, time.perf_counter_ns())
+            yield item
+            start = time.perf_counter_ns()
+
+    def attach(self, item: TimerItem):
+        self.last = item
+        if self.open:
+            self.open[-1][2].append(item)
+            if item.memory is not False:
+                self.open[-1][3] = max(self.open[-1][3], item.memory)
+        else:
+            self.spans.append(item)
+
+    def export(self) -> dict:
+        return {"unit": "ns", "total": self.total.stop - self.total.start, "spans": [item.export() for item in self.spans]}
 
 class All:
+    __slots__ = ("list", "count", "first", "last", "interval")
+
     def __init__(self, list: list) -> None:
         self.list = list
         self.count = len(self.list)
         if self.count > 0:
-            self.first = Prime(self.list[0], Primes.str("frstp"), "First", 1)
-            self.last = Prime(self.list[-1], Primes.str("lastp"), "Last", self.count)
+            self.first = Prime(int(self.list[0]), Primes.str("frstp"), "First", 1)
+            self.last = Prime(int(self.list[-1]), Primes.str("lastp"), "Last", self.count)
             self.interval = f"{{{self.first.value}..{self.last.value}}}"
 
 class Range(All):
+    """Primes of the requested range; `list` is a zero-copy view into the primes of All when sieved from 0."""
+    __slots__ = ("result", "half", "head", "tail")
+
     def __init__(self, list: list, index_first, index_last) -> None:
+        first, last = (int(list[0]), int(list[-1])) if len(list) > 0 else (False, False)
+        self.describe(list, len(list), first, last, index_first, index_last, list[:5], list[-5:])
+
+    def describe(self, list, count: int, first, last, index_first, index_last, head, tail) -> None:
+        """Sets the attributes from the count, lowest and highest prime (False when not known) and their indexes."""
         self.list = list
-        self.count = len(self.list)
-        if self.count > 0:
-            self.first = Prime(self.list[0], Primes.str("lwstp"), "min(𝑥)", index_first)
-            self.last = Prime(self.list[-1], Primes.str("highp"), "max(𝑥)", index_last)
-            self.interval = f"{{{self.first.value}..{self.last.value}}}"
-        else:
-            self.first = Prime(False, Primes.str("lwstp"), "min(𝑥)", False)
-            self.last = Prime(False, Primes.str("highp"), "max(𝑥)", False)
-            self.interval = False
+        self.count = count
+        self.first = Prime(first, Primes.str("lwstp"), "min(𝑥)", index_first)
+        self.last = Prime(last, Primes.str("highp"), "max(𝑥)", index_last)
+        self.interval = f"{{{first}..{last}}}" if count > 0 and first is not False else False
         match self.count:
             case 0: self.result = Primes.str("r_npf")
             case 1: self.result = Primes.str("r_1pf")
             case _: self.result = f"{self.count} {Primes.str('r_psf')}"
         self.half = int(self.count // 2)
+        self.head = head
+        self.tail = tail
+
+class SummaryRange(Range):
+    """Range known only from a sieve Summary, without the list of primes."""
+    __slots__ = ()
+
+    def __init__(self, summary) -> None:
+        first, last = (summary.first, summary.last) if summary.count > 0 else (False, False)
+        self.describe(None, summary.count, first, last, False, False, summary.head, summary.tail)
+
+class CountRange(Range):
+    """Range known only from the number of its primes (and their sum when found together), counted without sieving."""
+    __slots__ = ("total",)
+
+    def __init__(self, count: int, total: int = None) -> None:
+        self.describe(None, count, False, False, False, False, (), ())
+        self.total = total
 
 class Request:
+    __slots__ = ("first", "last", "count", "interval", "title")
+
     def __init__(self, start, stop) -> None:
         self.first = int(start)
         self.last = int(stop)
@@ -120,57 +300,116 @@ class Request:
         self.title = f"{Primes.str('title')} {self.interval}:"
 
 class Gaps:
-    def __init__(self, list: list) -> None:
-        gaps, gaps_list = {}, []
-        if len(list) > 1:
-            for i in range(len(list) - 1):
-                gap = list[i+1] - list[i]
-                try:
-                    gaps[gap] += 1
-                except KeyError:
-                    gaps[gap] = 1
-                gaps_list.append((list[i], list[i+1], gap))
-            gaps_list.append((list[-1], None, None))
+    __slots__ = ("kinds", "list", "first", "last", "name", "count", "max", "min", "com", "counter")
+
+    def __init__(self, list: list, counter: GapCounter = None) -> None:
+        if counter is None:
+            if vector.is_array(list) and len(list) > 1:
+                counter = vector.gaps(list)
+            else:
+                counter = GapCounter()
+                counter.add(list)
+        gaps = {gap: counter[gap][0] for gap in counter}
+        if gaps:
             max_value = max(gaps)
-            max_list = tuple((i[0], i[1]) for i in gaps_list if i[2] == max_value)
             min_value = min(gaps)
-            min_list = tuple((i[0], i[1]) for i in gaps_list if i[2] == min_value)
             com_count = max(gaps.values())
             com_value = next((i for i in gaps if gaps[i] == com_count))
-            com_list = tuple((i[0], i[1]) for i in gaps_list if i[2] == com_value)
         else:
             max_value, min_value, com_value = False, False, False
-            max_list, min_list, com_list = (), (), ()
+        self.counter = counter
         self.kinds = gaps
         self.list = tuple(sorted(gaps.keys()))
-        self.first = self.list[0]
-        self.last = self.list[-1]
+        self.first = self.list[0] if self.list else False
+        self.last = self.list[-1] if self.list else False
         self.name = Primes.str("g_kin")
         self.count = len(self.list)
         
-        self.max = ParamGaps(max_value, max_list, Primes.str("g_max"), "∆ₘₐₓ")
-        self.min = ParamGaps(min_value, min_list, Primes.str("g_min"), "∆ₘᵢₙ")
-        self.com = ParamGaps(com_value, com_list, Primes.str("g_com"), "∆ᶠ")
+        self.max = self.param(list, counter, max_value, Primes.str("g_max"), "∆ₘₐₓ")
+        self.min = self.param(list, counter, min_value, Primes.str("g_min"), "∆ₘᵢₙ")
+        self.com = self.param(list, counter, com_value, Primes.str("g_com"), "∆ᶠ")
+
+    def param(self, list, counter, gap, name, symbol):
+        if gap is False:
+            return ParamGaps(False, (), name, symbol)
+        return ParamGaps(gap, Pairs(list, gap, *counter[gap]), name, symbol)
 
 class Primes:
     """
     Calculating primes, their statistics and other related numbers in specified range.
     Usage:  primes x        for range {1..𝑥}
     or      primes x y      for range {𝑥..𝑦}
-    where x and y are positive natural numbers, 𝑥 ≥ 1, 𝑦 ≥ 𝑥 and 𝑦 < 10000000.
+    where x and y are positive natural numbers, 𝑥 ≥ 1, 𝑦 ≥ 𝑥 and 𝑦 ≤ 10¹⁴.
+    Ranges ending above `span` are sieved in segments and may not be wider than `span`.
+    Only the given `stages` run on creation, results of the others (gaps, sum, mean,
+    mersennes...) are computed on first access, e.g. Primes(1, 10**8).range.count sieves only.
+    With `count_only` primes are counted and summed without sieving (counting.pi, counting.sigma)
+    and only the `countable` stages are available, e.g. Primes(1, 10**11, count_only=True).sum.
     """
-    max = 100000000
+    max = 10 ** 14
+    span = 100000000
+    # None: "numpy" (when installed) for ranges ending above `vectorize`, "bits" below
+    engine = None
+    vectorize = 10 ** 6
+    workers = 1
+    cache = True
+    memory = False
+    count_only = False
+    stages = ("sieve",)
+    countable = ("sieve", "basics")
+    # attributes set by each stage
+    outputs = {
+        "sieve": ("sieved", "index", "all", "range", "summary"),
+        "gaps": ("gaps",),
+        "basics": ("pcent", "sum"),
+        "stats": ("moments", "median", "mean", "pstdev", "pvariance", "stdev", "variance", "q1", "q3", "qi"),
+        "weird": ("thabits", "mersennes", "fermats", "wagstaffs"),
+        "constellations": ("constellations", "twins", "cousins", "sexy", "triplets", "quadruplets", "records"),
+    }
     
-    def __init__(self, first, last):
+    def __init__(self, first, last, engine = None, workers = None, cache = None, stages = None, memory = None,
+            count_only = None):
         self.error = []
+        self.done = set()
+        # odd base primes of segmented ranges kept between extends, up to twice the √𝑦 they were sieved for
+        self.base = None
+        if engine is not None: self.engine = engine
+        if workers is not None: self.workers = workers
+        if cache is not None: self.cache = cache
+        if stages is not None: self.stages = tuple(stages)
+        if memory is not None: self.memory = memory
+        if count_only is not None: self.count_only = count_only
         if self.check(first, last):
-            self.time = Timer()
-            self.sieve()
-            self.gaps()
-            self.basics()
-            self.stats()
-            self.weird()
-            self.time.stop()
+            self.time = Timer(self.memory)
+            if self.count_only: self.time.names = dict(Timer.names, sieve = "timen")
+            for stage in self.stages:
+                self.run(stage)
+
+    def __getattr__(self, name):
+        """Runs the stage which sets a missing result attribute on its first access."""
+        for stage, outputs in Primes.outputs.items():
+            if name in outputs and "request" in self.__dict__ and stage not in self.done:
+                if self.count_only and stage not in self.countable:
+                    raise AttributeError(f"'{name}' is not available: {self.str('e_cnt')}")
+                self.run(stage)
+                return getattr(self, name)
+        raise AttributeError(f"'Primes' object has no attribute '{name}'")
+
+    def run(self, stage: str):
+        """Runs the stage (after the sieve it depends on) unless it has already run."""
+        if stage in self.done:
+            return
+        if stage != "sieve":
+            self.run("sieve")
+        with self.time.stage(stage):
+            match stage:
+                case "sieve": self.calc_sieve()
+                case "gaps": self.calc_gaps()
+                case "basics": self.calc_basics()
+                case "stats": self.calc_stats()
+                case "weird": self.calc_weird()
+                case "constellations": self.calc_constellations()
+        self.done.add(stage)
 
     def check(self, first, last):
         try:
@@ -187,154 +426,391 @@ class Primes:
         if last < 1: self.error.append(self.str('e_pos'))
         if first > last: self.error .append(self.str('e_gtb'))
         if last > self.max: self.error.append(self.str('e_max'))
+        if last > self.span and last - first >= self.span and self.workers == 1 and not self.count_only:
+            self.error.append(self.str('e_spn'))
+        if self.engine is None: self.engine = "numpy" if "numpy" in engines and last > self.vectorize else "bits"
+        if self.engine not in engines: self.error.append(self.str('e_eng'))
+        if self.workers < 1: self.error.append(self.str('e_wrk'))
+        if not set(self.stages) <= set(self.outputs): self.error.append(self.str('e_stg'))
+        elif self.count_only and not set(self.stages) <= set(self.countable): self.error.append(self.str('e_cnt'))
         if not self.error:
             self.request = Request(first, last)
+            # imported here, so that the import is not timed as part of the sieve
+            if self.engine == "numpy": vector.preload()
             return True
         else:
             return False
     
-    def sieve(self):
-        n = self.request.last
-        sieve_array = [True for i in range(n + 1)]
-        sieve_array[0], sieve_array[1] = False, False
-
-        for i in range(math.isqrt(n) + 1):
-            if sieve_array[i] == True:
-                for j in range(i * 2 , n + 1, i):
-                    sieve_array[j] = False
-
-        primes_all = tuple(k for k, v in enumerate(sieve_array) if v == True)
-        primes_range = tuple(i for i in primes_all if i >= self.request.first)
-                
+    def calc_sieve(self):
+        if self.count_only:
+            self.sieved = "count"
+            self.index = None
+            self.all = None
+            if "basics" in self.stages:
+                self.range = CountRange(*counting.count_total(self.request.first, self.request.last))
+            else:
+                self.range = CountRange(counting.count(self.request.first, self.request.last))
+            return
+        if self.workers > 1:
+            self.parallel("constellations" in self.stages)
+            return
+        if self.request.last > self.span:
+            self.segmented()
+            return
+        if self.cache and self.engine != "list" and self.request.last >= 2 * SegmentedSieve.segment:
+            self.sieved = "cache"
+            sieve = CachedSieve(1, self.request.last, Cache(), self.engine == "numpy")
+            sieve.trace = lambda blocks: self.time.each(blocks, "Block")
+        else:
+            self.sieved = self.engine
+            sieve = engines[self.engine](self.request.last)
+        primes_all = sieve.primes()
+        bitmap = sieve.bitmap if sieve.bitmap is not None else pack(primes_all, self.request.last)
+        self.index = Index(bitmap, self.request.last)
+        self.select(primes_all)
+
+    def select(self, primes_all):
+        """Sets All and the Range view from the index and primes sieved from 0 (possibly beyond 𝑦)."""
+        count = self.index.pi(self.request.last)
+        if len(primes_all) > count:
+            primes_all = primes_all[:count] if vector.is_array(primes_all) else memoryview(primes_all)[:count]
+        offset = self.index.pi(self.request.first - 1)
+        primes_range = primes_all[offset:] if vector.is_array(primes_all) else memoryview(primes_all)[offset:]
+
         self.all = All(primes_all)
         if len(primes_all) > 0 and len(primes_range) > 0:
-            first_index = primes_all.index(primes_range[0]) + 1
-            self.range = Range(primes_range, first_index, self.all.count)
+            self.range = Range(primes_range, offset + 1, self.all.count)
         else:
             self.range = Range(primes_range, 0, self.all.count)
-        
-        self.time.sieve()
 
-    def gaps(self):
-        if self.range.count >= 2:
+    def segmented(self):
+        """Sieves the range in windows, from cached blocks unless it is much narrower than a block."""
+        if self.cache and 4 * self.request.count >= 2 * SegmentedSieve.segment:
+            self.sieved = "cache"
+            sieve = CachedSieve(self.request.first, self.request.last, Cache())
+            sieve.trace = lambda blocks: self.time.each(blocks, "Block")
+            primes_range = sieve.primes()
+        else:
+            self.sieved = "segmented"
+            sieve = SegmentedSieve(self.request.first, self.request.last)
+            primes_range = array("Q")
+            for primes in self.time.each(sieve.segments(), "Segment"):
+                primes_range.extend(primes)
+        self.index = None
+        self.all = None
+        self.range = Range(primes_range, False, False)
+
+    def parallel(self, constellations: bool = False, first: int = None):
+        """Sieves the range in worker processes, from `first` on into the Summary kept so far when given."""
+        sieve = ParallelSieve(first or self.request.first, self.request.last, self.workers, constellations)
+        summary = sieve.summary()
+        for lo, hi, pid, start, stop in summary.spans:
+            self.time.record(f"Task {lo}..{hi} (pid {pid})", start, stop)
+        self.summary = summary if first is None else self.summary.merge(summary)
+        self.sieved = "parallel"
+        self.index = None
+        self.all = None
+        self.range = SummaryRange(self.summary)
+
+    def extend(self, last) -> bool:
+        """
+        Extends the range to {𝑥..last}. Only numbers above the old end are sieved, into the bitmap,
+        index and primes kept so far with the base primes already found (or into the Summary of
+        parallel ranges), and results of the stages which have run are updated from the new primes:
+        the gap counter, sum, moments and constellations grow, other results follow from them.
+        A range sieved from 0 which has to be segmented from now on is sieved anew.
+        On False `error` holds the reasons, errors of earlier calls are dropped.
+        """
+        request = self.request
+        self.error = []
+        if not self.check(request.first, last):
+            return False
+        if self.request.last < request.last:
+            self.request = request
+            self.error.append(self.str("e_ext"))
+            return False
+        if self.request.last == request.last:
+            return True
+        if self.count_only or self.workers == 1 and request.last <= self.span < self.request.last:
+            self.reset()
+            return True
+        if self.workers > 1:
+            with self.time.stage("sieve"):
+                self.parallel(self.summary.constellations is not None, request.last + 1)
+            stages = self.done - {"sieve"}
+            self.done -= stages
+            for stage in self.outputs:
+                if stage in stages:
+                    self.run(stage)
+            return True
+        previous = self.range.last.value
+        counter = self.gaps.counter if "gaps" in self.done else None
+        # results holding views of the primes are dropped, so that the primes can grow in place
+        self.__dict__.pop("gaps", None)
+        with self.time.stage("sieve"):
+            new = self.sieve_above(request.last)
+        for stage in self.outputs:
+            if stage == "sieve" or stage not in self.done:
+                continue
+            with self.time.stage(stage):
+                match stage:
+                    case "gaps":
+                        if previous and len(new) > 0:
+                            counter.record(int(new[0]) - previous, previous)
+                        if vector.is_array(new) and len(new) > 1:
+                            counter.merge(vector.gaps(new))
+                        else:
+                            counter.add(new)
+                        self.calc_gaps(counter)
+                    case "basics":
+                        total = vector.total(new) if vector.is_array(new) else sum(new)
+                        self.calc_basics((self.sum.value or 0) + total)
+                    case "stats":
+                        self.calc_stats(self.moments.merge(vector.moments(new) if vector.is_array(new) else Moments(new)))
+                    case "weird":
+                        self.calc_weird()
+                    case "constellations":
+                        self.constellations.add(new)
+                        self.calc_constellations(self.constellations)
+        return True
+
+    def sieve_above(self, old: int):
+        """Sieves {old+1..𝑦} into the primes kept so far, returns the new primes."""
+        last = self.request.last
+        if self.index is None:
+            root = math.isqrt(last)
+            if self.base is None or self.base[-1] < root:
+                self.base = BitSieve(2 * root).primes()[1:]
+            new = SegmentedSieve(old + 1, last, self.base).primes()
+            self.range = Range(append(self.range.list, new), False, False)
+            return new
+        root = math.isqrt(last)
+        base = tuple(self.all.list[1:self.index.pi(root)].tolist()) if root <= old else None
+        whole = (old + 1) // 16
+        bitmap = self.index.bitmap
+        if not isinstance(bitmap, bytearray) or len(bitmap) > whole + 1:
+            # read-only, or reaching beyond 𝑦 as the bitmap of a larger range this one is a window of
+            bitmap = bytearray(bitmap[:whole])
+        else:
+            del bitmap[whole:]
+        new = array("Q", [2] if old < 2 else [])
+        for origin, window in SegmentedSieve(16 * whole + 1, last, base).windows():
+            bitmap += window
+            unpack(window, origin, new)
+        del new[:bisect_right(new, old)]
+        primes_all = self.all.list
+        if vector.is_array(primes_all):
+            new = vector.numpy.array(new, dtype = vector.numpy.int64)
+        self.all = self.range = None
+        self.index = Index(bitmap, last, self.index)
+        self.select(append(primes_all, new))
+        return new
+
+    def window(self, first, last):
+        """
+        Primes of {first..last} as a new Primes object sharing the primes of this one instead of
+        sieving them: a range sieved from 0 shares its bitmap, index and primes (extended first when
+        last is above 𝑦), a segmented range slices its primes when the window lies within it.
+        Other windows are sieved anew. Stages of the window run on the primes of the window.
+        """
+        p = Primes(first, last, self.engine, self.workers, self.cache, (), self.memory, self.count_only)
+        p.stages = self.stages
+        if p.error:
+            return p
+        first, last = p.request.first, p.request.last
+        if self.index is not None and last <= self.span and (last <= self.request.last or self.extend(last)):
+            with p.time.stage("sieve"):
+                p.sieved = self.sieved
+                p.index = self.index
+                p.select(self.all.list)
+            p.done.add("sieve")
+        elif self.range.list is not None and self.request.first <= first and last <= self.request.last:
+            with p.time.stage("sieve"):
+                primes = self.range.list
+                p.sieved = self.sieved
+                p.index = None
+                p.all = None
+                p.range = Range(primes[bisect_left(primes, first):bisect_right(primes, last)], False, False)
+            p.done.add("sieve")
+        for stage in p.stages:
+            p.run(stage)
+        return p
+
+    def reset(self):
+        """Drops the results of all stages and runs the given ones again."""
+        for stage in self.done:
+            for name in self.outputs[stage]:
+                self.__dict__.pop(name, None)
+        self.done.clear()
+        for stage in self.stages:
+            self.run(stage)
+
+    def calc_gaps(self, counter: GapCounter = None):
+        if self.range.list is None:
+            self.gaps = Gaps(None, self.summary.gaps)
+        elif counter is not None:
+            self.gaps = Gaps(self.range.list, counter)
+        elif self.range.count >= 2:
             self.gaps = Gaps(self.range.list)
         else:
             self.gaps = Gaps([])
-        self.time.gaps()
 
-    def basics(self):
+    def calc_basics(self, total: int = None):
         if self.range.count > 0:
             self.pcent = ParamStat(round(self.range.count / self.request.count * 100, 4), self.str("pcent"), "%")
-            self.sum = ParamStat(sum(self.range.list), self.str("sumpr"), "Σ𝑥")
+            if total is None:
+                if self.count_only:
+                    total = self.range.total
+                    if total is None:
+                        total = counting.total(self.request.first, self.request.last)
+                elif self.range.list is None:
+                    total = self.summary.moments.sum
+                elif vector.is_array(self.range.list):
+                    total = vector.total(self.range.list)
+                else:
+                    total = sum(self.range.list)
+            self.sum = ParamStat(total, self.str("sumpr"), "Σ𝑥")
         else:
             self.pcent = ParamStat(False, self.str("pcent"), "%")
             self.sum = ParamStat(False, self.str("sumpr"), "Σ𝑥")
-        self.time.basics()
 
-    def stats(self):
+    def calc_stats(self, moments: Moments = None):
+        if moments is not None:
+            self.moments = moments
+        elif self.range.list is None:
+            self.moments = self.summary.moments
+        elif vector.is_array(self.range.list):
+            self.moments = vector.moments(self.range.list)
+        else:
+            self.moments = Moments(self.range.list)
         if self.range.count >= 2:
-            self.median = ParamStat(stat.median(self.range.list), self.str("mdnpr"), "𝑀𝑒")
-            self.mean = ParamStat(stat.mean(self.range.list), self.str("amean"), "μ")
-            self.pstdev = ParamStat(stat.pstdev(self.range.list), self.str("pstdv"), "σ𝑥")
-            self.pvariance = ParamStat(stat.pvariance(self.range.list), self.str("pvari"), "σ²𝑥")
-            self.stdev = ParamStat(stat.stdev(self.range.list), self.str("stdev"), "s𝑥")
-            self.variance = ParamStat(stat.variance(self.range.list), self.str("svari"), "s²𝑥")
-            self.q1 = ParamStat(stat.median(self.range.list[:self.range.half]), self.str("lquar"), "Q₁")
-            self.q3 = ParamStat(stat.median(self.range.list[-self.range.half:]), self.str("uquar"), "Q₃")
-            self.qi = ParamStat(self.q3.value - self.q1.value, self.str("irang"), "Qᵢ")
+            self.mean = ParamStat(self.moments.mean(), self.str("amean"), "μ")
+            self.pstdev = ParamStat(self.moments.pstdev(), self.str("pstdv"), "σ𝑥")
+            self.pvariance = ParamStat(self.moments.pvariance(), self.str("pvari"), "σ²𝑥")
+            self.stdev = ParamStat(self.moments.stdev(), self.str("stdev"), "s𝑥")
+            self.variance = ParamStat(self.moments.variance(), self.str("svari"), "s²𝑥")
         else:
-            self.median = ParamStat(False, self.str("mdnpr"), "𝑀𝑒")
             self.mean = ParamStat(False, self.str("amean"), "μ")
             self.pstdev = ParamStat(False, self.str("pstdv"), "σ𝑥")
             self.pvariance = ParamStat(False, self.str("pvari"), "σ²𝑥")
             self.stdev = ParamStat(False, self.str("stdev"), "s𝑥")
             self.variance = ParamStat(False, self.str("svari"), "s²𝑥")
+        if self.range.list is not None and self.range.count >= 2:
+            self.median = ParamStat(median(self.range.list), self.str("mdnpr"), "𝑀𝑒")
+            self.q1 = ParamStat(median(self.range.list, 0, self.range.half), self.str("lquar"), "Q₁")
+            self.q3 = ParamStat(median(self.range.list, self.range.count - self.range.half), self.str("uquar"), "Q₃")
+            self.qi = ParamStat(self.q3.value - self.q1.value, self.str("irang"), "Qᵢ")
+        else:
+            self.median = ParamStat(False, self.str("mdnpr"), "𝑀𝑒")
             self.q1 = ParamStat(False, self.str("lquar"), "Q₁")
             self.q3 = ParamStat(False, self.str("uquar"), "Q₃")
             self.qi = ParamStat(False, self.str("irang"), "Qᵢ")
-        self.time.stats()
-        
-    def weird(self):
-        if self.range.count > 0:
-            self.thabits = ParamList(self.find_thabits(), self.str("p_tha"), "3⋅2ⁿ-1")
-            self.mersennes = ParamList(self.find_mersennes(), self.str("p_mer"), "2ⁿ-1")
-            self.fermats = ParamList(self.find_fermats(), self.str("p_fer"), "2^2ⁿ-1")
-            self.wagstaffs = ParamList(self.find_wagstaffs(), self.str("p_wag"), "(2ᵖ+1)/3")
+
+    def calc_weird(self):
+        self.thabits = ParamList(self.find_thabits(), self.str("p_tha"), "3⋅2ⁿ-1")
+        self.mersennes = ParamList(self.find_mersennes(), self.str("p_mer"), "2ⁿ-1")
+        self.fermats = ParamList(self.find_fermats(), self.str("p_fer"), "2^2ⁿ-1")
+        self.wagstaffs = ParamList(self.find_wagstaffs(), self.str("p_wag"), "(2ᵖ+1)/3")
+
+    def calc_constellations(self, constellations: Constellations = None):
+        """Constellations of the range, counted by the workers in parallel ranges (sieved again
+        when the stage was not asked for on creation)."""
+        if constellations is not None:
+            self.constellations = constellations
+        elif self.range.list is not None:
+            self.constellations = Constellations(self.range.list)
         else:
-            self.thabits = ParamList([], self.str("p_tha"), "3⋅2ⁿ-1")
-            self.mersennes = ParamList([], self.str("p_mer"), "2ⁿ-1")
-            self.fermats = ParamList(self.find_fermats(), self.str("p_fer"), "2^2ⁿ-1")
-            self.wagstaffs = ParamList(self.find_wagstaffs(), self.str("p_wag"), "(2ᵖ+1)/3")
-        self.time.weird()
-
-    def find_carols(self):
-        i, c = 0, 0
-        carols = set()
-        while c < self.request.last:
-            c = (2 ** i - 1) ** 2 - 2
-            carols.add(c)
-            i += 1 
-        return tuple(sorted(carols & set(self.range.list)))
+            if self.summary.constellations is None:
+                self.parallel(True)
+            self.constellations = self.summary.constellations
+        counts = self.constellations.counts
+        self.twins = ParamStat(counts["twins"], self.str("c_twi"), "(𝑝, 𝑝+2)")
+        self.cousins = ParamStat(counts["cousins"], self.str("c_cou"), "(𝑝, 𝑝+4)")
+        self.sexy = ParamStat(counts["sexy"], self.str("c_sex"), "(𝑝, 𝑝+6)")
+        self.triplets = ParamStat(counts["triplets"], self.str("c_tri"), "(𝑝,…,𝑝+6)")
+        self.quadruplets = ParamStat(counts["quadruplets"], self.str("c_qua"), "(𝑝,…,𝑝+8)")
+        self.records = ParamList(tuple(self.constellations.records), self.str("g_rec"), "∆")
 
     def find_thabits(self):
-        i, t = 0, 0
-        thabits = set()
-        while t < self.request.last:
-            t = 3 * 2 ** i - 1
-            thabits.add(t)
-            i += 1 
-        return tuple(sorted(thabits & set(self.range.list)))
+        return self.members(self.candidates(lambda n: 3 * 2 ** n - 1))
     
     def find_mersennes(self):
-        i, m = 0, 0
-        mersennes = set()
-        while m < self.request.last:
-            m = 2 ** i - 1
-            mersennes.add(m)
-            i += 1
-        return tuple(sorted(mersennes & set(self.range.list)))
+        return self.members(self.candidates(lambda n: 2 ** n - 1))
 
     def find_fermats(self):
-        i, f = 0, 0
-        fermats = set()
-        while f < self.request.last:
-            f = 2 ** 2 ** i + 1
-            fermats.add(f)
-            i += 1
-        return tuple(sorted(fermats & set(self.range.list)))
+        return self.members(self.candidates(lambda n: 2 ** 2 ** n + 1))
     
     def find_wagstaffs(self):
-        i, w = 0, 0
-        wagstaffs = set()
-        while w < self.request.last:
-            p = self.range.list[i]
-            if (p % 2) != 0:
-                w = (2 ** p + 1) / 3
-                if w.is_integer():
-                    wagstaffs.add(int(w))
-            i += 1
-        return tuple(sorted(wagstaffs & set(self.range.list)))
+        return self.members(self.candidates(lambda p: (2 ** p + 1) // 3, 3, 2))
+
+    def candidates(self, form, start: int = 0, step: int = 1):
+        """Yields values of the increasing integer form(n) for n = start, start + step, ... up to 𝑦."""
+        n = start
+        while (c := form(n)) <= self.request.last:
+            yield c
+            n += step
+
+    def members(self, numbers):
+        """Tuple of those (increasing) numbers which are primes in the requested range."""
+        return tuple(filter(self.is_prime, numbers))
 
     def is_prime(self, p: int):
-        return True if p in self.range.list else False
+        """Whether 𝑝 is a prime in the requested range: a bitmap lookup when sieved from 0,
+        binary search in segmented ranges and the Miller–Rabin test in parallel ones."""
+        if not self.request.first <= p <= self.request.last:
+            return False
+        if self.index is not None:
+            return self.index.is_prime(p)
+        if self.range.list is None:
+            return primality.is_prime(p)
+        i = bisect_left(self.range.list, p)
+        return i < self.range.count and self.range.list[i] == p
+
+    def pi(self, x: int):
+        """Number of primes ≤ 𝑥 (prime-counting function), for 𝑥 ≤ 𝑦 in ranges sieved from 0."""
+        if self.index is None or x > self.request.last:
+            return False
+        return self.index.pi(x)
+
+    def nth(self, n: int):
+        """The 𝑛-th prime, for primes ≤ 𝑦 in ranges sieved from 0."""
+        if self.index is None or n > self.all.count:
+            return False
+        return self.index.nth(n)
     
     @staticmethod
     def str(code):
         match code:
             case "amean": return "Arithmetic mean"
+            case "argsf": return "Cannot open file"
             case "argsm": return "Too many arguments"
+            case "argso": return "Format of --output must be given with --format or as the extension of the file"
             case "b_int": return "Beginning of range must be an integer"
             case "b_pos": return "Beginning of range must be a positive natural number"
+            case "c_cou": return "Cousin primes"
+            case "c_qua": return "Prime quadruplets"
+            case "c_sex": return "Sexy primes"
+            case "c_tri": return "Prime triplets"
+            case "c_twi": return "Twin primes"
             case "e_gt2": return "End of range must be greater than or equal to 2"
             case "e_gtb": return "End of the range must be greater than its beginning"
+            case "e_bat": return f"End of range must not exceed {Primes.span} in batch mode"
+            case "e_cnt": return f"Only these stages can run when only counting: {', '.join(Primes.countable)}"
+            case "e_eng": return f"Sieve engine must be one of: {', '.join(engines)}"
+            case "e_ext": return "End of range must not be less than the current one"
             case "e_int": return "End of range must be an integer"
             case "e_max": return f"End of range must be less than {Primes.max}"
+            case "e_wrk": return "Number of workers must be a positive integer"
+            case "e_stg": return f"Stages must be chosen from: {', '.join(Primes.outputs)}"
+            case "e_spn": return f"Range above {Primes.span} must not span more than {Primes.span} numbers"
             case "e_pos": return "End of range must be a positive natural number"
             case "frstp": return "First prime"
             case "g_com": return "Most common gap"
             case "g_max": return "Longest gap"
             case "g_min": return "Shortest gap"
             case "g_oth": return "Other gaps"
+            case "g_rec": return "Maximal gap records"
+            case "g_sum": return "Only the first and last pair of a gap are known without the primes (parallel sieve)"
             case "g_kin": return "Different gap lengths"
             case "highp": return "Highest prime"
             case "irang": return "Interquartile Range"
@@ -343,9 +819,6 @@ class Primes:
             case "lwstp": return "Lowest prime"
             case "mdnpr": return "Median (middle value)"
             case "notap": return "Not applicable"
-            case "p_cen": return "Centrist primes"
-            case "p_dem": return "Democratic primes"
-            case "p_rep": return "Republican primes"
             case "p_tha": return "Thabit primes"
             case "p_mer": return "Mersenne primes"
             case "p_fer": return "Fermat primes"
@@ -360,7 +833,9 @@ class Primes:
             case "sumpr": return "Sum of primes"
             case "svari": return "Sample variance"
             case "timeb": return "Basics"
+            case "timec": return "Constellations"
             case "timeg": return "Gaps"
+            case "timen": return "Count"
             case "timew": return "Curiosities"
             case "times": return "Stats"
             case "timep": return "Sieve"
@@ -0,0 +1,365 @@
+import math, os, time
+from array import array
+from itertools import chain, compress
+from moments import Constellations, GapCounter, Moments
+import vector
+
+# translate() tables: BIT[r] maps a byte to its r-th bit (0 or 1),
+# CLEAR[r] maps a byte to itself with the r-th bit cleared
+BIT = tuple(bytes((b >> r) & 1 for b in range(256)) for r in range(8))
+CLEAR = tuple(bytes(b & ~(1 << r) & 0xFF for b in range(256)) for r in range(8))
+
+# small primes pre-crossed by prefill(); their pattern over odd numbers repeats every 3·5·7·11·13 bits,
+# so PATTERN (built on first use) holds 8 periods in 15015 bytes
+WHEEL = (3, 5, 7, 11, 13)
+PATTERN = None
+
+class Sieve:
+    """
+    Base class for sieve engines. An engine sieves {0..last}
+    and returns all primes found there as a sorted array('Q') (8 bytes per prime).
+    Engines which keep a bit-packed odd-only bitmap expose it as `bitmap`.
+    """
+    name = ""
+    bitmap = None
+
+    def __init__(self, last: int) -> None:
+        self.last = last
+
+    def primes(self) -> array:
+        raise NotImplementedError
+
+class ListSieve(Sieve):
+    """
+    Plain sieve of Eratosthenes on a list of booleans, one per number.
+    """
+    name = "list"
+
+    def primes(self) -> array:
+        n = self.last
+        sieve_array = [True for i in range(n + 1)]
+        sieve_array[0] = False
+        if n >= 1: sieve_array[1] = False
+        for i in range(2, math.isqrt(n) + 1):
+            if sieve_array[i]:
+                for j in range(i * i, n + 1, i):
+                    sieve_array[j] = False
+        return array("Q", compress(range(n + 1), sieve_array))
+
+class BitSieve(Sieve):
+    """
+    Odd-only, bit-packed sieve of Eratosthenes.
+    Bit k of the bitmap stands for the odd number 2k+1, so {0..𝑛} takes 𝑛/16 bytes.
+    """
+    name = "bits"
+
+    def __init__(self, last: int) -> None:
+        super().__init__(last)
+        self.size = (last + 1) // 2
+        self.bitmap = bitmap(self.size)
+        if self.size > 0:
+            self.bitmap[0] &= 0xFE
+        for k in range(1, (math.isqrt(last) + 1) // 2):
+            if test(self.bitmap, k):
+                cross(self.bitmap, self.size, k * 2 + 1, (k * 2 + 1) ** 2 // 2)
+
+    def count(self) -> int:
+        return popcount(self.bitmap) + (self.last >= 2)
+
+    def primes(self) -> array:
+        return unpack(self.bitmap, 1, array("Q", [2] if self.last >= 2 else []))
+
+class WheelSieve(BitSieve):
+    """
+    Odd-only, bit-packed sieve whose bitmap is pre-filled by copying a pattern with
+    the multiples of the WHEEL primes 3, 5, 7, 11 and 13 already crossed off,
+    so only primes from 17 on are crossed off one by one.
+    """
+    name = "wheel"
+
+    def __init__(self, last: int) -> None:
+        Sieve.__init__(self, last)
+        self.size = (last + 1) // 2
+        self.bitmap = prefill(0, self.size)
+        if self.size > 0:
+            self.bitmap[0] &= 0xFE
+        for k in range(WHEEL[-1] // 2 + 1, (math.isqrt(last) + 1) // 2):
+            if test(self.bitmap, k):
+                cross(self.bitmap, self.size, k * 2 + 1, (k * 2 + 1) ** 2 // 2)
+
+class NumpySieve(Sieve):
+    """
+    Odd-only sieve on a NumPy boolean array, returns primes as an int64 array.
+    """
+    name = "numpy"
+
+    def primes(self):
+        odd = vector.sieve(self.last)
+        self.bitmap = vector.pack(odd)
+        return vector.primes(odd, self.last)
+
+class SegmentedSieve:
+    """
+    Segmented sieve of {first..last}. Base primes up to √last come from BitSieve,
+    the range itself is sieved in fixed-size, bit-packed windows of `segment` odd numbers,
+    so memory depends on the window size and not on the magnitude of the numbers.
+    """
+    segment = 1 << 21
+
+    def __init__(self, first: int, last: int, base: tuple = None, segment: int = None) -> None:
+        self.first = first
+        self.last = last
+        if segment is not None: self.segment = segment
+        self.base = base if base is not None else BitSieve(math.isqrt(last)).primes()[1:]
+
+    def window(self, lo: int, hi: int) -> bytearray:
+        """Bitmap of odd numbers {lo..hi} (lo odd) with composites crossed off, pre-filled for the WHEEL primes."""
+        size = (hi - lo) // 2 + 1
+        window = prefill(lo // 2, size)
+        if lo == 1:
+            window[0] &= 0xFE
+        for p in self.base:
+            if p * p > hi:
+                break
+            if p <= WHEEL[-1]:
+                continue
+            m = max(p * p, (lo + p - 1) // p * p)
+            if m % 2 == 0:
+                m += p
+            if m <= hi:
+                cross(window, size, p, (m - lo) // 2)
+        return window
+
+    def windows(self):
+        """Yields (lo, bitmap) of every window of odd numbers in the range."""
+        for lo in range(max(self.first, 1) | 1, self.last + 1, 2 * self.segment):
+            yield lo, self.window(lo, min(lo + 2 * self.segment - 2, self.last))
+
+    def segments(self):
+        """Yields primes of the range as one list per window."""
+        if self.first <= 2 <= self.last:
+            yield [2]
+        for lo, window in self.windows():
+            yield unpack(window, lo)
+
+    def primes(self) -> array:
+        return array("Q", chain.from_iterable(self.segments()))
+
+class Summary:
+    """
+    Mergeable summary of consecutive primes: their Moments (count, sum, squares, first
+    and last prime), up to `keep` primes from both ends, the GapCounter of their gaps
+    and, when asked for, their Constellations (None otherwise).
+    `spans` are (first, last, pid, start, stop) perf_counter_ns spans of the worker tasks.
+    """
+    keep = 5
+
+    def __init__(self, constellations: bool = False) -> None:
+        self.moments = Moments()
+        self.head = ()
+        self.tail = ()
+        self.gaps = GapCounter()
+        self.constellations = Constellations() if constellations else None
+        self.spans = []
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    @property
+    def first(self):
+        return self.moments.min
+
+    @property
+    def last(self):
+        return self.moments.max
+
+    def add(self, primes: list) -> None:
+        """Adds sorted primes following those already summarized."""
+        if not primes:
+            return
+        if self.count:
+            self.gaps.record(primes[0] - self.last, self.last)
+        self.gaps.add(primes)
+        self.moments.add(primes)
+        if self.constellations is not None:
+            self.constellations.add(primes)
+        self.head = (self.head + tuple(primes[:self.keep]))[:self.keep]
+        self.tail = (self.tail + tuple(primes[-self.keep:]))[-self.keep:]
+
+    def merge(self, other: "Summary") -> "Summary":
+        """Appends a summary of primes following those already summarized."""
+        self.spans += other.spans
+        if not other.count:
+            return self
+        if self.count:
+            self.gaps.record(other.first - self.last, self.last)
+        self.gaps.merge(other.gaps)
+        self.moments.merge(other.moments)
+        if self.constellations is not None:
+            self.constellations.merge(other.constellations)
+        self.head = (self.head + other.head)[:self.keep]
+        self.tail = (self.tail + other.tail)[-self.keep:]
+        return self
+
+class ParallelSieve:
+    """
+    Segmented sieve of {first..last} spread over `workers` processes.
+    The range is split into tasks of whole segments; workers share the base primes
+    and send back only a Summary of their task, never the primes themselves.
+    """
+    def __init__(self, first: int, last: int, workers: int, constellations: bool = False) -> None:
+        self.first = first
+        self.last = last
+        self.workers = workers
+        self.constellations = constellations
+        self.sieve = SegmentedSieve(first, last)
+
+    def tasks(self):
+        width = 2 * SegmentedSieve.segment
+        step = max(width, -(-(self.last - self.first + 1) // (self.workers * 4 * width)) * width)
+        for lo in range(self.first, self.last + 1, step):
+            yield lo, min(lo + step - 1, self.last)
+
+    def summary(self) -> Summary:
+        from concurrent.futures import ProcessPoolExecutor
+        summary = Summary(self.constellations)
+        tasks = [(first, last, self.constellations) for first, last in self.tasks()]
+        with ProcessPoolExecutor(self.workers, initializer = share, initargs = (self.sieve.base,)) as executor:
+            for part in executor.map(summarize, *zip(*tasks)):
+                summary.merge(part)
+        return summary
+
+shared = ()
+
+def share(base: tuple) -> None:
+    """Worker initializer: keeps the base primes for all tasks of the process."""
+    global shared
+    shared = base
+
+def summarize(first: int, last: int, constellations: bool = False) -> Summary:
+    """Worker task: sieves {first..last} segment by segment into a Summary."""
+    start = time.perf_counter_ns()
+    summary = Summary(constellations)
+    for primes in SegmentedSieve(first, last, shared).segments():
+        summary.add(primes)
+    summary.spans.append((first, last, os.getpid(), start, time.perf_counter_ns()))
+    return summary
+
+def iter_primes(first: int, last: int, chunk: str = None, segment: int = None):
+    """
+    Yields primes of {first..last} lazily, sieving one window of `segment` odd numbers
+    (SegmentedSieve.segment by default) at a time, so memory is bounded by the window
+    and the base primes up to √last. Primes come one by one, or with `chunk` one chunk
+    per window: "list", "array" (array('Q')) or "numpy" (int64 array).
+    """
+    sieve = SegmentedSieve(first, last, segment = segment)
+    if first <= 2 <= last:
+        yield 2 if chunk is None else convert([2], chunk)
+    for lo, window in sieve.windows():
+        if chunk == "numpy":
+            numpy = vector.numpy
+            bits = numpy.unpackbits(numpy.frombuffer(window, dtype = numpy.uint8), bitorder = "little")
+            yield 2 * numpy.flatnonzero(bits) + lo
+        elif chunk is None:
+            yield from unpack(window, lo)
+        else:
+            yield convert(unpack(window, lo), chunk)
+
+def convert(primes: list, chunk: str):
+    match chunk:
+        case "list": return primes
+        case "array": return array("Q", primes)
+        case "numpy": return vector.numpy.array(primes, dtype = vector.numpy.int64)
+        case _: raise ValueError(f"Unknown chunk type: {chunk}")
+
+def append(primes, new):
+    """
+    The primes followed by the new ones: an array('Q') is extended in place unless views of it
+    are still in use, NumPy arrays grow into spare capacity (vector.append) and memoryviews
+    (views of primes of a larger range) are copied.
+    """
+    if vector.is_array(primes):
+        return vector.append(primes, new)
+    if isinstance(primes, memoryview):
+        primes = array("Q", primes.tobytes())
+    try:
+        primes.extend(new)
+    except BufferError:
+        primes = primes + array("Q", new)
+    return primes
+
+def prefill(k: int, size: int) -> bytearray:
+    """
+    Bitmap of `size` bits from bit k (the odd number 2k+1) with multiples of the WHEEL
+    primes cleared (the primes themselves kept), copied in bulk from the PATTERN.
+    """
+    global PATTERN
+    if PATTERN is None:
+        PATTERN = bitmap(8 * math.prod(WHEEL))
+        for p in WHEEL:
+            cross(PATTERN, len(PATTERN) * 8, p, p // 2)
+        PATTERN = bytes(PATTERN)
+    byte, shift = divmod(k % (8 * len(PATTERN)), 8)
+    count = (size + shift + 7) // 8
+    copies = (byte + count) // len(PATTERN) + 1
+    filled = bytearray((PATTERN * copies)[byte:byte + count])
+    if shift:
+        filled = bytearray((int.from_bytes(filled, "little") >> shift).to_bytes(count, "little"))
+    del filled[(size + 7) // 8:]
+    if size % 8:
+        filled[-1] &= (1 << (size % 8)) - 1
+    for p in WHEEL:
+        if 0 <= p // 2 - k < size:
+            j = p // 2 - k
+            filled[j >> 3] |= 1 << (j & 7)
+    return filled
+
+def bitmap(size: int) -> bytearray:
+    """Bitmap of `size` bits, all set."""
+    bitmap = bytearray(b"\xff") * ((size + 7) // 8)
+    if size % 8:
+        bitmap[-1] &= (1 << (size % 8)) - 1
+    return bitmap
+
+def test(bitmap: bytearray, k: int) -> bool:
+    return bitmap[k >> 3] >> (k & 7) & 1 == 1
+
+def cross(bitmap: bytearray, size: int, p: int, start: int) -> None:
+    """
+    Clears bits start, start+p, start+2p... below `size`.
+    For each of the 8 bit positions these fall on every 𝑝-th byte,
+    so they are crossed off with 8 slice assignments through CLEAR tables.
+    """
+    for j in range(start, min(start + 8 * p, size), p):
+        byte, table = j >> 3, CLEAR[j & 7]
+        bitmap[byte::p] = bitmap[byte::p].translate(table)
+
+def pack(primes, last: int) -> bytearray:
+    """Bit-packed odd-only bitmap of {0..last} with bits of the given primes set."""
+    packed = bytearray((last + 1) // 2 // 8 + 1)
+    for p in primes:
+        if p > 2:
+            packed[p >> 4] |= 1 << (p >> 1 & 7)
+    return packed
+
+def popcount(bitmap: bytearray) -> int:
+    return int.from_bytes(bitmap, "little").bit_count()
+
+def unpack(bitmap: bytearray, origin: int, numbers = None, chunk: int = 1 << 16):
+    """
+    Odd numbers origin+2k for every set bit k, unpacking the bitmap chunk by chunk.
+    They are appended to `numbers` (e.g. an array('Q')) or returned as a new list.
+    """
+    numbers = [] if numbers is None else numbers
+    for a in range(0, len(bitmap), chunk):
+        part = bitmap[a:a + chunk]
+        flags = bytearray(len(part) * 8)
+        for r in range(8):
+            flags[r::8] = part.translate(BIT[r])
+        numbers.extend(compress(range(origin + a * 16, origin + (a + len(part)) * 16, 2), flags))
+    return numbers
+
+engines = {engine.name: engine for engine in (ListSieve, BitSieve, WheelSieve)}
+if vector.numpy is not None:
+    engines[NumpySieve.name] = NumpySieve
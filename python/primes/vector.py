@@ -0,0 +1,158 @@
+# Vectorised NumPy versions of the sieve, gap and moment computations.
+# NumPy is optional: `numpy` is None when it is not installed and Primes falls back to pure Python.
+# It is imported on first use only, so that small ranges do not pay for the import.
+# Results are identical to the pure Python ones, sums are exact Python ints.
+import importlib, math, sys
+from importlib.util import find_spec
+from moments import GapCounter, Moments
+
+class Lazy:
+    """Stands for a module which is imported on first attribute access."""
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __getattr__(self, attribute):
+        return getattr(importlib.import_module(self.name), attribute)
+
+numpy = Lazy("numpy") if find_spec("numpy") is not None else None
+
+def preload() -> None:
+    """Imports NumPy now, e.g. before timing a computation which uses it."""
+    if numpy is not None:
+        importlib.import_module(numpy.name)
+
+# chunk length for exact sums: 2¹⁵ values below 2⁴⁸ never overflow int64
+chunk = 1 << 15
+
+def is_array(list) -> bool:
+    return "numpy" in sys.modules and isinstance(list, numpy.ndarray)
+
+def sieve(last: int):
+    """Odd-only sieve on a boolean array: element k is True when 2k+1 is prime."""
+    odd = numpy.ones((last + 1) // 2, dtype = bool)
+    odd[:1] = False
+    for k in range(1, (math.isqrt(last) + 1) // 2):
+        if odd[k]:
+            p = 2 * k + 1
+            odd[p * p // 2::p] = False
+    return odd
+
+def primes(odd, last: int):
+    """All primes ≤ last as an int64 array."""
+    primes = 2 * numpy.flatnonzero(odd) + 1
+    return numpy.concatenate(([2], primes)) if last >= 2 else primes
+
+def pack(odd) -> bytearray:
+    """The odd-only boolean array as a bit-packed bitmap."""
+    return bytearray(numpy.packbits(odd, bitorder = "little").tobytes())
+
+def total(primes) -> int:
+    return sum(int(primes[a:a + chunk].sum()) for a in range(0, len(primes), chunk))
+
+def squares(primes) -> int:
+    """Exact Σ𝑥², with 𝑥 split into 24-bit halves so that no partial sum overflows."""
+    result = 0
+    for a in range(0, len(primes), chunk):
+        part = primes[a:a + chunk]
+        hi, lo = part >> 24, part & 0xFFFFFF
+        result += (int((hi * hi).sum()) << 48) + (int((hi * lo).sum()) << 25) + int((lo * lo).sum())
+    return result
+
+def moments(primes) -> Moments:
+    moments = Moments()
+    moments.count = len(primes)
+    moments.sum = total(primes)
+    moments.squares = squares(primes)
+    if len(primes):
+        moments.extremes(int(primes.min()), int(primes.max()))
+    return moments
+
+def gaps(primes) -> GapCounter:
+    """GapCounter of the primes array from np.diff, np.bincount and first/last indexes of np.unique."""
+    diffs = numpy.diff(primes)
+    counts = numpy.bincount(diffs)
+    values, firsts = numpy.unique(diffs, return_index = True)
+    lasts = len(diffs) - 1 - numpy.unique(diffs[::-1], return_index = True)[1]
+    counter = GapCounter()
+    for i in numpy.argsort(firsts):
+        counter[int(values[i])] = [int(counts[values[i]]), int(primes[firsts[i]]), int(primes[lasts[i]])]
+    return counter
+
+def pairs(primes, gap: int) -> tuple:
+    """All (𝑝, 𝑞) pairs of consecutive primes with the given gap."""
+    index = numpy.flatnonzero(numpy.diff(primes) == gap)
+    return tuple(zip(primes[index].tolist(), primes[index + 1].tolist()))
+
+def append(primes, new):
+    """
+    The primes followed by the new ones, as a view of a buffer with spare capacity: they are written
+    in place after the primes when these start a writable buffer with room for them, otherwise both are
+    copied to a buffer twice as long, so that growing by small steps costs amortized 𝑂(len(new)).
+    Views of the primes are kept valid; a buffer shared by several ranges sieved from 0 is only
+    written with the same primes at the same positions.
+    """
+    n, k = len(primes), len(new)
+    buffer = primes.base if primes.base is not None else primes
+    if (isinstance(buffer, numpy.ndarray) and buffer.ndim == 1 and buffer.dtype == primes.dtype
+            and buffer.flags.writeable and len(buffer) >= n + k
+            and primes.ctypes.data == buffer.ctypes.data and primes.strides == buffer.strides):
+        buffer[n:n + k] = new
+        return buffer[:n + k]
+    buffer = numpy.empty(2 * (n + k), dtype = primes.dtype)
+    buffer[:n] = primes
+    buffer[n:n + k] = new
+    return buffer[:n + k]
+
+def lucy(x: int):
+    """Lucy_Hedgehog's table as in counting.lucy, each step done with array operations."""
+    r = math.isqrt(x)
+    small = numpy.arange(-1, r, dtype = numpy.int64)
+    large = numpy.zeros(r + 1, dtype = numpy.int64)
+    large[1:] = x // numpy.arange(1, r + 1, dtype = numpy.int64) - 1
+    for p in primes(sieve(r), r).tolist():
+        sp = int(small[p - 1])
+        lim = min(r, x // (p * p))
+        k = min(lim, r // p)
+        large[1:k + 1] -= large[p:k * p + 1:p] - sp
+        if lim > k:
+            large[k + 1:lim + 1] -= small[x // (numpy.arange(k + 1, lim + 1, dtype = numpy.int64) * p)] - sp
+        if p * p <= r:
+            small[p * p:] -= small[numpy.arange(p * p, r + 1) // p] - sp
+    return small, large
+
+def lucy_sum(x: int, counts: bool = False):
+    """
+    Exact sum of primes ≤ 𝑥 from Lucy_Hedgehog's table of sums as in counting.lucy. Sums overflow int64
+    above 𝑥 ≈ 10¹⁰, so the table is kept twice: modulo 2⁶⁴ in uint64 arrays, whose wrapping arithmetic
+    stays exact, and approximately in float64 arrays, which tell the multiple of 2⁶⁴ to add back.
+    With `counts` the table of π is updated in the same pass and (π(𝑥), σ(𝑥)) is returned.
+    """
+    r = math.isqrt(x)
+    v = numpy.arange(r + 1, dtype = numpy.int64)
+    q = numpy.zeros(r + 1, dtype = numpy.int64)
+    q[1:] = x // v[1:]
+    # (small, large, weighted by 𝑝)
+    tables = [(triangle(v), triangle(q), True), (v * (v + 1.0) / 2 - 1, q * (q + 1.0) / 2 - 1, True)]
+    if counts:
+        tables.append((v - 1, q - 1, False))
+    for p in primes(sieve(r), r).tolist():
+        lim = min(r, x // (p * p))
+        k = min(lim, r // p)
+        i = x // (numpy.arange(k + 1, lim + 1, dtype = numpy.int64) * p)
+        j = v[p * p:] // p if p * p <= r else None
+        for small, large, weighted in tables:
+            w, sp = small.dtype.type(p if weighted else 1), small[p - 1]
+            large[1:k + 1] -= (large[p:k * p + 1:p] - sp) * w
+            large[k + 1:lim + 1] -= (small[i] - sp) * w
+            if j is not None:
+                small[p * p:] -= (small[j] - sp) * w
+    low = int(tables[0][1][1])
+    total = low + round((float(tables[1][1][1]) - low) / 2 ** 64) * 2 ** 64
+    return (int(tables[2][1][1]), total) if counts else total
+
+def triangle(v):
+    """𝑣(𝑣+1)/2 - 1 modulo 2⁶⁴, halving the even factor first so that the product wraps exactly."""
+    even = v % 2 == 0
+    a = numpy.where(even, v // 2, v).astype(numpy.uint64)
+    b = numpy.where(even, v + 1, (v + 1) // 2).astype(numpy.uint64)
+    return a * b - numpy.uint64(1)
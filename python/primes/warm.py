@@ -0,0 +1,84 @@
+import math
+from array import array
+from itertools import accumulate
+from batch import describe
+from index import Index
+from primes import Primes
+from sieve import SegmentedSieve, unpack
+import primality
+
+class Warm:
+    """
+    Bit-packed, odd-only sieve of {0..last} with its Index, the primes and their prefix sums,
+    kept in memory for many queries. It grows on demand: numbers beyond last (up to `limit`)
+    are sieved in SegmentedSieve windows and appended, at least doubling them so growing stays rare.
+    """
+    limit = Primes.span
+
+    def __init__(self, last: int = 1 << 20) -> None:
+        self.last = -1
+        self.bitmap = bytearray()
+        self.index = None
+        self.primes = array("Q", [2])
+        self.sums = array("Q", [0, 2])
+        self.grow(last)
+
+    def grow(self, x: int) -> None:
+        """Sieves up to at least 𝑥; last stays 16𝑚 - 1 so the bitmap is made of whole bytes."""
+        if x <= self.last:
+            return
+        last = (min(max(x, 2 * self.last), self.limit) // 16 + 1) * 16 - 1
+        count = len(self.primes)
+        for origin, window in SegmentedSieve(self.last + 2, last).windows():
+            self.bitmap += window
+            unpack(window, origin, self.primes)
+        self.sums.extend(accumulate(self.primes[count:], initial = self.sums[-1]))
+        del self.sums[count + 1]
+        self.last = last
+        self.index = Index(self.bitmap, last, self.index)
+
+    def check(self, x: int) -> None:
+        if x > self.limit:
+            raise ValueError(f"{x} is above the limit of the warm sieve ({self.limit})")
+
+    def is_prime(self, n: int) -> bool:
+        """Bit test up to `limit`, primality.is_probable_prime above (exact below 3.3·10²⁴)."""
+        if n > self.limit:
+            return primality.is_probable_prime(n)
+        self.grow(n)
+        return self.index.is_prime(n)
+
+    def pi(self, x: int) -> int:
+        self.check(x)
+        self.grow(x)
+        return self.index.pi(x)
+
+    def nth(self, n: int) -> int:
+        """
+        The 𝑛-th prime, growing the sieve past the bound 𝑛(ln 𝑛 + ln ln 𝑛) of 𝑝ₙ when needed.
+        When 𝑝ₙ > 𝑛 ln 𝑛 is already above `limit` the query is rejected without growing.
+        """
+        if n < 1:
+            raise ValueError(f"{n} is not a positive index")
+        if n > self.index.count and n * math.log(n) > self.limit:
+            raise ValueError(f"the {n}-th prime is above the limit of the warm sieve ({self.limit})")
+        if n > self.index.count:
+            bound = int(n * (math.log(n) + math.log(math.log(n)))) + 1 if n >= 6 else 13
+            self.grow(min(bound, self.limit))
+        if n > self.index.count:
+            raise ValueError(f"the {n}-th prime is above the limit of the warm sieve ({self.limit})")
+        return self.index.nth(n)
+
+    def range(self, first: int, last: int) -> dict:
+        """Count, lowest and highest prime, sum and gaps of the primes in {first..last}."""
+        return describe(first, last, *self.select(first, last))
+
+    def select(self, first: int, last: int) -> tuple:
+        """
+        A copy of the primes in {first..last}, located with the index, and their sum from the prefix sums.
+        Copying is a memcpy, so the gaps of a wide range may be counted from it in another thread.
+        """
+        self.check(last)
+        self.grow(last)
+        lo, hi = self.index.pi(first - 1), self.index.pi(last)
+        return self.primes[lo:hi], self.sums[hi] - self.sums[lo]